@@ -0,0 +1,138 @@
+from dataclasses import dataclass, field, fields
+from datetime import date
+from enum import IntEnum
+from typing import Any, Dict, List, Tuple
+
+from rules import calc_idade, derive_imc
+
+# -------- Respostas de uma sessão em formato compacto --------
+# Um slot por campo (sem dict por instância), sim/não e níveis de órgão como enums, listas como tuplas e a data como
+# date. Idade e IMC não são guardados: são calculados quando lidos. get()/to_dict() devolvem exatamente a codificação
+# antiga ("sim"/"nao", "moderada", data ISO, listas), que é o que as regras, o store e a exportação recebem.
+
+class SimNao(IntEnum):
+    NAO = 0
+    SIM = 1
+
+    def __str__(self) -> str:
+        return "sim" if self else "nao"
+
+class Orgao(IntEnum):
+    # Mesmo vocabulário de rules.norm_orgao
+    NORMAL = 0
+    LEVE = 1
+    MODERADA = 2
+    GRAVE = 3
+    DESCONHECIDO = 4
+
+    def __str__(self) -> str:
+        return self.name.lower()
+
+CAMPOS_SIM_NAO = frozenset({"tem_comorbidades", "gravidez", "amamentando", "tratamento_cancer", "gi_grave", "gastroparesia",
+                            "pancreatite_previa", "historico_mtc_men2", "colecistite_12m", "transtorno_alimentar",
+                            "uso_corticoide", "antipsicoticos", "alergia_glp1", "usou_antes"})
+CAMPOS_ORGAO = frozenset({"insuf_renal", "insuf_hepatica"})
+CAMPOS_LISTA = frozenset({"alergias_componentes", "quais"})
+DERIVADOS = ("idade", "idade_calculada")
+
+@dataclass(slots=True, weakref_slot=True, eq=False)  # identidade: um registro por sessão
+class Answers:
+    nome: str | None = None
+    email: str | None = None
+    identidade: str | None = None
+    data_nascimento: date | None = None
+    peso: int | None = None
+    altura: float | None = None
+    tem_comorbidades: SimNao | None = None
+    comorbidades: str | None = None
+    gravidez: SimNao | None = None
+    amamentando: SimNao | None = None
+    tratamento_cancer: SimNao | None = None
+    gi_grave: SimNao | None = None
+    gastroparesia: SimNao | None = None
+    pancreatite_previa: SimNao | None = None
+    historico_mtc_men2: SimNao | None = None
+    colecistite_12m: SimNao | None = None
+    outras_contra: str | None = None
+    insuf_renal: Orgao | None = None
+    insuf_hepatica: Orgao | None = None
+    transtorno_alimentar: SimNao | None = None
+    uso_corticoide: SimNao | None = None
+    antipsicoticos: SimNao | None = None
+    alergias_componentes: Tuple[str, ...] | None = None
+    outros_componentes: str | None = None
+    alergia_glp1: SimNao | None = None
+    usou_antes: SimNao | None = None
+    quais: Tuple[str, ...] | None = None
+    efeitos: str | None = None
+    objetivo: str | None = None
+    pronto_mudar: int | None = None
+    aceite_termo: bool | None = None
+    autoriza_teleconsulta: bool | None = None
+    lgpd: bool | None = None
+    veracidade: bool | None = None
+    # JSON das respostas já gerado (versão, texto); descartado a cada mudança
+    json_cache: Tuple[int, str] | None = field(default=None, repr=False)
+    expirada: bool = field(default=False, repr=False)
+
+    @property
+    def idade(self) -> int | None:
+        return calc_idade(self.data_nascimento)
+
+    @property
+    def imc(self) -> float | None:
+        return derive_imc({"peso": self.peso, "altura": self.altura})
+
+    def get(self, campo: str, padrao: Any = None) -> Any:
+        if campo in DERIVADOS: v = self.idade
+        else: v = _decodificar(campo, getattr(self, campo))
+        return padrao if v is None else v
+
+    def update(self, novos: Dict[str, Any]) -> List[str]:
+        # Grava só o que mudou; devolve os campos alterados
+        mudou = []
+        for k, v in novos.items():
+            if k in DERIVADOS: continue
+            v = codificar(k, v)
+            if getattr(self, k) != v:
+                setattr(self, k, v); mudou.append(k)
+        if mudou: self.json_cache = None
+        return mudou
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = {}
+        for c in CAMPOS:
+            v = getattr(self, c)
+            if v is not None: d[c] = _decodificar(c, v)
+        idade = self.idade
+        if idade is not None: d["idade"] = d["idade_calculada"] = idade
+        return d
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Answers":
+        a = cls()
+        a.update({k: v for k, v in d.items() if k in CAMPOS})
+        return a
+
+    def clear(self) -> None:
+        for c in CAMPOS: setattr(self, c, None)
+        self.json_cache = None
+
+CAMPOS = tuple(f.name for f in fields(Answers) if f.repr)
+
+def codificar(campo: str, v: Any) -> Any:
+    if v is None: return None
+    if campo in CAMPOS_SIM_NAO: return SimNao.SIM if v in ("sim", True) else SimNao.NAO
+    if campo in CAMPOS_ORGAO: return Orgao[v.upper()]
+    if campo in CAMPOS_LISTA: return tuple(v)
+    if campo == "data_nascimento":
+        # "" (data inválida na etapa 0) fica como não respondida
+        return date.fromisoformat(v) if isinstance(v, str) and v else (v or None)
+    return v
+
+def _decodificar(campo: str, v: Any) -> Any:
+    if v is None: return None
+    if campo in CAMPOS_SIM_NAO or campo in CAMPOS_ORGAO: return str(v)
+    if campo in CAMPOS_LISTA: return list(v)
+    if campo == "data_nascimento": return v.isoformat()
+    return v
@@ -0,0 +1,147 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+from typing import Any, Dict, List
+
+from batch import classify
+from rules import evaluate_rules, norm_orgao
+
+# -------- API de pré-triagem (ASGI, sem Streamlit) --------
+# POST /score        corpo JSON com as respostas -> {"status", "reasons", "idade"}
+# POST /score/batch  corpo NDJSON (uma resposta por linha) -> NDJSON em streaming, na mesma ordem
+# GET  /health
+# Rodar: python api.py --port 8000  (uvicorn com um worker por núcleo)
+
+SIM_NAO = {"Sim": "sim", "sim": "sim", "Não": "nao", "não": "nao", "nao": "nao"}
+CAMPOS_SIM_NAO = ["gravidez", "amamentando", "tratamento_cancer", "pancreatite_previa", "historico_mtc_men2", "alergia_glp1",
+                  "gi_grave", "gastroparesia", "colecistite_12m", "transtorno_alimentar", "uso_corticoide", "antipsicoticos",
+                  "tem_comorbidades", "usou_antes"]
+BLOCO_LOTE = 1_000
+MAX_CORPO = 1 << 20  # limite do /score (o lote é lido em streaming)
+
+CAMPOS_TEXTO = CAMPOS_SIM_NAO + ["insuf_renal", "insuf_hepatica", "data_nascimento"]
+CAMPOS_NUMERO = ["idade", "peso", "altura"]
+
+def _numero(k: str, v: Any) -> Any:
+    if isinstance(v, str):
+        try: v = int(v) if k == "idade" else float(v)
+        except ValueError: raise ValueError(f"{k}: número inválido") from None
+    if isinstance(v, bool) or not isinstance(v, (int, float)): raise ValueError(f"{k}: deve ser um número")
+    # 1e400 e NaN chegam do JSON como inf/nan, e Infinity/NaN na resposta não é JSON válido para os clientes
+    if not math.isfinite(v): raise ValueError(f"{k}: número inválido")
+    return v
+
+def normalize_answers(a: Dict[str, Any]) -> Dict[str, Any]:
+    # Aceita tanto os rótulos da tela ("Sim", "Moderada") quanto os valores gravados pelo app ("sim", "moderada").
+    # Tipos errados nos campos que as regras leem viram ValueError (400 no /score, {"error"} na linha do lote)
+    a = dict(a)
+    for k in CAMPOS_TEXTO:
+        if a.get(k) is not None and not isinstance(a[k], str): raise ValueError(f"{k}: deve ser texto")
+    for k in CAMPOS_NUMERO:
+        if a.get(k) is not None: a[k] = _numero(k, a[k])
+    al = a.get("alergias_componentes")
+    if al is not None and not (isinstance(al, list) and all(isinstance(x, str) for x in al)):
+        raise ValueError("alergias_componentes: deve ser uma lista de textos")
+    for k in CAMPOS_SIM_NAO:
+        if k in a: a[k] = SIM_NAO.get(a[k], a[k])
+    for k in ("insuf_renal", "insuf_hepatica"):
+        if a.get(k): a[k] = norm_orgao(a[k])
+    return a
+
+def score(a: Dict[str, Any]) -> Dict[str, Any]:
+    a = normalize_answers(a)
+    status, reasons = evaluate_rules(a)
+    return {"status": status, "reasons": reasons, "idade": a.get("idade")}
+
+def _score_linhas(linhas: List[bytes]) -> bytes:
+    respostas, erros = [], {}
+    for i, l in enumerate(linhas):
+        try:
+            a = json.loads(l)
+            if not isinstance(a, dict): raise ValueError("cada linha deve ser um objeto JSON")
+            respostas.append(normalize_answers(a))
+        except (ValueError, TypeError) as e:
+            erros[i] = str(e); respostas.append({})
+    idx, resultados = classify(respostas)
+    trechos = [json.dumps({"status": s, "reasons": m}, ensure_ascii=False) for s, m in resultados]
+    saida = [json.dumps({"error": erros[i]}, ensure_ascii=False) if i in erros else trechos[k] for i, k in enumerate(idx)]
+    return ("\n".join(saida) + "\n").encode()
+
+async def _responder(send, status: int, corpo: Any, tipo: str = "application/json") -> None:
+    dados = corpo if isinstance(corpo, bytes) else json.dumps(corpo, ensure_ascii=False).encode()
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", tipo.encode()), (b"content-length", str(len(dados)).encode())]})
+    await send({"type": "http.response.body", "body": dados})
+
+async def _ler_corpo(receive, limite: int) -> bytes | None:
+    partes, total = [], 0
+    while True:
+        msg = await receive()
+        if msg["type"] == "http.disconnect": return None
+        partes.append(msg.get("body", b"")); total += len(partes[-1])
+        if total > limite: return None
+        if not msg.get("more_body"): return b"".join(partes)
+
+async def _score_lote(receive, send) -> None:
+    # Lê o NDJSON em pedaços e devolve cada bloco de BLOCO_LOTE linhas assim que é avaliado. A avaliação (CPU) roda
+    # no executor padrão do loop, para um lote grande não travar as outras requisições do worker
+    loop = asyncio.get_running_loop()
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/x-ndjson")]})
+    resto, pendentes = b"", []
+    while True:
+        msg = await receive()
+        if msg["type"] == "http.disconnect": return
+        linhas = (resto + msg.get("body", b"")).split(b"\n")
+        resto = linhas.pop()
+        pendentes.extend(l for l in linhas if l.strip())
+        fim = not msg.get("more_body")
+        if fim and resto.strip(): pendentes.append(resto)
+        while len(pendentes) >= BLOCO_LOTE or (fim and pendentes):
+            bloco, pendentes = pendentes[:BLOCO_LOTE], pendentes[BLOCO_LOTE:]
+            corpo = await loop.run_in_executor(None, _score_linhas, bloco)
+            await send({"type": "http.response.body", "body": corpo, "more_body": True})
+        if fim: break
+    await send({"type": "http.response.body", "body": b""})
+
+async def app(scope, receive, send) -> None:
+    if scope["type"] == "lifespan":
+        while (msg := await receive())["type"] != "lifespan.shutdown":
+            await send({"type": "lifespan.startup.complete"})
+        await send({"type": "lifespan.shutdown.complete"}); return
+    if scope["type"] != "http": return
+
+    metodo, caminho = scope["method"], scope["path"].rstrip("/")
+    if caminho == "/health" and metodo == "GET":
+        return await _responder(send, 200, {"ok": True})
+    if caminho == "/score/batch" and metodo == "POST":
+        return await _score_lote(receive, send)
+    if caminho == "/score" and metodo == "POST":
+        corpo = await _ler_corpo(receive, MAX_CORPO)
+        if corpo is None: return await _responder(send, 413, {"error": "corpo ausente ou muito grande"})
+        try:
+            a = json.loads(corpo)
+            if not isinstance(a, dict): raise ValueError("o corpo deve ser um objeto JSON")
+            resultado = score(a)
+        except (ValueError, TypeError) as e:
+            return await _responder(send, 400, {"error": str(e)})
+        return await _responder(send, 200, resultado)
+    if caminho in ("/health", "/score", "/score/batch"):
+        return await _responder(send, 405, {"error": "método não permitido"})
+    await _responder(send, 404, {"error": "não encontrado"})
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="API HTTP de pré-triagem ViaLeve.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8000)
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processos (padrão: um por núcleo)")
+    args = p.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("Instale o uvicorn para servir a API: pip install uvicorn")
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import argparse
+import csv
+import json
+import sys
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, TextIO, Tuple
+
+import numpy as np
+
+from rules import EXCIPIENTES_COMUNS, OPERADORES, REGRAS, condicoes, evaluate_rules
+
+# -------- Reavaliação em lote (colunar, sem Streamlit) --------
+# Mesma semântica de rules.evaluate_rules (mesma tabela REGRAS), mas sobre colunas NumPy de um bloco de respostas
+# já em memória (classify/evaluate_batch, usados pelo /score/batch). O CLI (run) lê e avalia linha a linha.
+
+CONDICOES = [condicoes(r) for r in REGRAS]
+MOTIVOS = [(r[0], r[3]) for r in REGRAS]
+CAMPOS_REGRAS = list(dict.fromkeys(c for conds in CONDICOES for c, _, _ in conds))
+# Campos lidos das respostas: os usados pelas regras, trocando os derivados pelas suas fontes
+CAMPOS = [c for c in CAMPOS_REGRAS if c not in ("idade", "imc")] + ["data_nascimento", "idade", "peso", "altura"]
+
+# Bits das alergias: um por excipiente conhecido + um para qualquer outro valor
+BIT_ALERGIA = {nome: 1 << i for i, nome in enumerate(EXCIPIENTES_COMUNS)}
+BIT_OUTRA = 1 << len(EXCIPIENTES_COMUNS)
+
+def _alergia_em_bits(campo: str, op: str, x: Any) -> bool:
+    # "informado exceto <um excipiente conhecido>" sai dos bits, sem a coluna object das listas
+    return op == "informado_exceto" and campo == "alergias_componentes" and isinstance(x, list) and len(x) == 1 and x[0] in BIT_ALERGIA
+
+# Campos que precisam da coluna object (comparados como estão); idade e imc já são numéricos
+COMPARADOS = list(dict.fromkeys(c for conds in CONDICOES for c, op, x in conds if c not in ("idade", "imc") and not _alergia_em_bits(c, op, x)))
+
+# Versão Python de cada operador, gerada das mesmas expressões usadas pelo RuleEngine
+PREDICADOS = {op: eval(f"lambda v, x: {expr.format(v='v', x='x')}") for op, expr in OPERADORES.items()}
+
+def _parse_dob(v: Any) -> int:
+    # Data como inteiro AAAAMMDD; -1 quando não há data válida
+    if isinstance(v, str):
+        try: v = date.fromisoformat(v)
+        except ValueError: return -1
+    if isinstance(v, date): return v.year * 10000 + v.month * 100 + v.day
+    return -1
+
+# Dias de cada mês (índice 1–12; fevereiro acerta com o bissexto)
+DIAS_MES = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int64)
+
+def _datas(valores: List[Any]) -> np.ndarray:
+    # AAAAMMDD de cada data (-1 sem data válida). Strings "AAAA-MM-DD" são convertidas em bloco, pelos códigos dos
+    # caracteres; o resto (date, outros formatos ISO, datas impossíveis) passa por _parse_dob, uma a uma.
+    texto = np.array([v if type(v) is str and len(v) == 10 else "" for v in valores], dtype="U10")
+    c = texto.view(np.uint32).reshape(len(valores), 10).astype(np.int64) - 48
+    digitos = np.delete(c, (4, 7), axis=1)
+    ano = digitos[:, 0] * 1000 + digitos[:, 1] * 100 + digitos[:, 2] * 10 + digitos[:, 3]
+    mes, dia = digitos[:, 4] * 10 + digitos[:, 5], digitos[:, 6] * 10 + digitos[:, 7]
+    bissexto = (ano % 4 == 0) & ((ano % 100 != 0) | (ano % 400 == 0))
+    ok = ((digitos >= 0) & (digitos <= 9)).all(axis=1) & (c[:, 4] == -3) & (c[:, 7] == -3) & (ano >= 1) & (mes >= 1) & (mes <= 12)
+    ok &= (dia >= 1) & (dia <= DIAS_MES[np.where(ok, mes, 0)] + (bissexto & (mes == 2)))
+    datas = np.where(ok, ano * 10000 + mes * 100 + dia, -1)
+    for i in np.flatnonzero(~ok).tolist():
+        if valores[i]: datas[i] = _parse_dob(valores[i])
+    return datas
+
+def _to_float(v: Any) -> float:
+    # Falsy ou não numérico vira NaN (evaluate_rules trata como "sem IMC")
+    if not v: return np.nan
+    try: return float(v)
+    except (TypeError, ValueError, OverflowError): return np.nan
+
+def _to_idade(v: Any) -> float:
+    # Idade informada: None ou não numérica (ex.: "abc" vindo do CSV) vira NaN (sem idade); 0 continua 0
+    if v is None: return np.nan
+    try: return float(v)
+    except (TypeError, ValueError, OverflowError): return np.nan
+
+def _alergia_bits(v: Any) -> Tuple[int, int]:
+    if not v: return 0, 0
+    if not isinstance(v, list): return BIT_OUTRA, 1
+    bits = 0
+    for item in v: bits |= BIT_ALERGIA.get(item, BIT_OUTRA) if isinstance(item, str) else BIT_OUTRA
+    return bits, len(v)
+
+def to_columns(rows: List[Dict[str, Any]], hoje: date | None = None) -> Dict[str, np.ndarray]:
+    hoje = hoje or date.today()
+    # Uma passada por resposta (cada dict é lido enquanto está no cache) e a transposição fica com o zip, em C
+    colunas = dict(zip(CAMPOS, map(list, zip(*[tuple(map(r.get, CAMPOS)) for r in rows]))))
+    # Colunas object só para os campos comparados como estão (idade, imc e alergias ganham versão numérica abaixo)
+    cols: Dict[str, np.ndarray] = {k: np.fromiter(colunas[k], dtype=object, count=len(rows)) for k in COMPARADOS}
+
+    # Idade: datas convertidas em bloco; a conta da idade é vetorizada
+    datas = _datas(colunas["data_nascimento"])
+    tem_dob = datas >= 0
+    ano, mmdd = datas // 10000, datas % 10000
+    idade_dob = hoje.year - ano - (hoje.month * 100 + hoje.day < mmdd)
+    idade_campo = np.array(list(map(_to_idade, colunas["idade"])), dtype=np.float64)
+    cols["idade"] = np.where(tem_dob, idade_dob, idade_campo)
+
+    if "alergias_componentes" in colunas:
+        # Poucas combinações distintas de alergias: cada uma é codificada uma única vez
+        cache_al: Dict[Any, Tuple[int, int]] = {}
+        def alergia(v: Any) -> Tuple[int, int]:
+            chave = tuple(v) if isinstance(v, list) else v
+            try: return cache_al[chave]
+            except TypeError: return _alergia_bits(v)
+            except KeyError:
+                p = cache_al[chave] = _alergia_bits(v)
+                return p
+        bits, qtd = zip(*map(alergia, colunas["alergias_componentes"]))
+        cols["alergias_bits"] = np.array(bits, dtype=np.int64)
+        cols["alergias_qtd"] = np.array(qtd, dtype=np.int64)
+
+    peso = np.array(list(map(_to_float, colunas["peso"])), dtype=np.float64)
+    altura = np.array(list(map(_to_float, colunas["altura"])), dtype=np.float64)
+    with np.errstate(all="ignore"):
+        alt2 = altura ** 2
+        imc = peso / alt2
+    cols["imc"] = np.where(np.isfinite(alt2) & (alt2 != 0), imc, np.nan)
+    return cols
+
+def _condicao(cols: Dict[str, np.ndarray], campo: str, op: str, x: Any) -> np.ndarray:
+    if _alergia_em_bits(campo, op, x):
+        q, b = cols["alergias_qtd"], cols["alergias_bits"]
+        return (q > 0) & ~((q == 1) & (b == BIT_ALERGIA[x[0]]))
+    col = cols[campo]
+    if col.dtype == np.float64:
+        # Colunas numéricas usam NaN para "sem valor" (None nas respostas)
+        if op == "<": return col < x
+        if op == ">=": return col >= x
+    elif op == "==" and isinstance(x, str): return col == x
+    elif op == "!=" and isinstance(x, str): return col != x
+    elif op == "in" and all(isinstance(y, str) for y in x):
+        return np.logical_or.reduce([col == y for y in x]) if x else np.zeros(len(col), dtype=bool)
+    # Demais combinações: elemento a elemento com a mesma expressão do RuleEngine
+    f = PREDICADOS[op]
+    vals = [None if isinstance(v, float) and np.isnan(v) else v for v in col.tolist()] if col.dtype == np.float64 else col.tolist()
+    return np.fromiter((bool(f(v, x)) for v in vals), dtype=bool, count=len(vals))
+
+def evaluate_columns(cols: Dict[str, np.ndarray]) -> np.ndarray:
+    # Retorna uma máscara (regras x linhas) na ordem de REGRAS
+    n = len(cols["idade"])
+    m = np.ones((len(CONDICOES), n), dtype=bool)
+    for j, conds in enumerate(CONDICOES):
+        for campo, op, x in conds: m[j] &= _condicao(cols, campo, op, x)
+    return m
+
+def classify(rows: List[Dict[str, Any]], hoje: date | None = None) -> Tuple[List[int], List[Tuple[str, List[str]]]]:
+    # Cada combinação de motivos vira um código; o resultado é montado uma vez por código distinto.
+    # Retorna (índice do resultado por linha, resultados distintos).
+    if not rows: return [], []
+    m = evaluate_columns(to_columns(rows, hoje))
+    pesos = (1 << np.arange(len(MOTIVOS), dtype=np.int64))[:, None]
+    unicos, inv = np.unique((m * pesos).sum(axis=0), return_inverse=True)
+    resultados = []
+    for c in unicos.tolist():
+        motivos = [msg for j, (_, msg) in enumerate(MOTIVOS) if c >> j & 1]
+        resultados.append(("excluido" if motivos else "potencialmente_elegivel", motivos))
+    return inv.tolist(), resultados
+
+def evaluate_batch(rows: List[Dict[str, Any]], hoje: date | None = None) -> List[Tuple[str, List[str]]]:
+    idx, resultados = classify(rows, hoje)
+    return [(resultados[i][0], resultados[i][1][:]) for i in idx]
+
+# -------- Entrada / saída --------
+def _csv_row(r: Dict[str, str]) -> Dict[str, Any]:
+    # CSV só tem texto: células vazias são omitidas, alergias vêm como lista JSON ou separadas por ";"
+    out: Dict[str, Any] = {k: v for k, v in r.items() if v not in ("", None)}
+    al = out.get("alergias_componentes")
+    if isinstance(al, str):
+        out["alergias_componentes"] = json.loads(al) if al.startswith("[") else [x.strip() for x in al.split(";") if x.strip()]
+    if "idade" in out:
+        try: out["idade"] = int(out["idade"])
+        except ValueError: pass
+    return out
+
+def read_rows(path: str, fmt: str | None = None) -> Iterator[Dict[str, Any]]:
+    fmt = fmt or ("csv" if path.endswith(".csv") else "jsonl")
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8", newline="")
+    try:
+        if fmt == "csv":
+            for r in csv.DictReader(f): yield _csv_row(r)
+        else:
+            for line in f:
+                if line.strip(): yield json.loads(line)
+    finally:
+        if f is not sys.stdin: f.close()
+
+def write_results(rows: Iterable[Dict[str, Any]], out: TextIO, id_field: str | None = None) -> int:
+    # Um resultado JSON por linha, na ordem da entrada, com evaluate_rules linha a linha: no CLI quem domina é ler o
+    # JSON (~60% do tempo), e montar colunas de dicts recém-lidos empatava com avaliar cada um enquanto ainda está no
+    # cache. status/motivos são serializados uma vez por resultado distinto.
+    trechos: Dict[Tuple[str, ...], str] = {}
+    total = 0
+    for total, r in enumerate(rows, 1):
+        extra = f', {json.dumps(id_field)}: {json.dumps(r.get(id_field), ensure_ascii=False)}' if id_field else ""
+        idade = r.get("idade")
+        if idade is not None and type(idade) not in (int, float):
+            # Como em to_columns: idade não numérica (ex.: "abc" vindo do CSV) conta como não informada
+            idade = _to_idade(idade); r["idade"] = None if np.isnan(idade) else idade
+        status, reasons = evaluate_rules(r)  # grava idade em r, por isso o id é lido antes
+        chave = tuple(reasons)
+        trecho = trechos.get(chave)
+        if trecho is None: trecho = trechos[chave] = json.dumps({"status": status, "reasons": reasons}, ensure_ascii=False)[1:]
+        out.write(f'{{"row": {total - 1}{extra}, {trecho}\n')
+    return total
+
+def run(src: str, dst: str, fmt: str | None = None, id_field: str | None = None) -> int:
+    out = sys.stdout if dst == "-" else open(dst, "w", encoding="utf-8")
+    try:
+        return write_results(read_rows(src, fmt), out, id_field)
+    finally:
+        if out is not sys.stdout: out.close()
+
+def main(argv: List[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Reavalia a pré-elegibilidade de respostas salvas (JSONL/CSV) em lote.")
+    p.add_argument("entrada", help="arquivo .jsonl ou .csv ('-' para stdin)")
+    p.add_argument("-o", "--saida", default="-", help="arquivo JSONL de saída (padrão: stdout)")
+    p.add_argument("--formato", choices=["jsonl", "csv"], help="força o formato da entrada")
+    p.add_argument("--id", dest="id_field", help="campo da entrada copiado para cada resultado (ex.: email)")
+    args = p.parse_args(argv)
+    n = run(args.entrada, args.saida, args.formato, args.id_field)
+    print(f"{n} respostas avaliadas.", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import List
+
+import httpx
+
+import api
+from benchmarks.dados import gerar_respostas
+
+# Uso: python -m benchmarks.bench_api --n 5000 --concorrencia 64 --sessoes-streamlit 20
+#      (--url http://127.0.0.1:8000 mede um servidor real: python api.py --port 8000)
+
+def percentil(xs: List[float], p: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100 * (len(xs) - 1))))]
+
+def resumo(nome: str, n: int, total: float, lat: List[float], unidade: str = "req") -> None:
+    print(f"{nome}: {n / total:10,.0f} {unidade}/s   p50 {percentil(lat, 50) * 1e3:8.2f} ms   p99 {percentil(lat, 99) * 1e3:8.2f} ms")
+
+def cliente(url: str | None) -> httpx.AsyncClient:
+    if url: return httpx.AsyncClient(base_url=url, limits=httpx.Limits(max_connections=256))
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://api")
+
+async def bench_score(url: str | None, respostas: List[dict], concorrencia: int) -> None:
+    lat: List[float] = []
+    sem = asyncio.Semaphore(concorrencia)
+    async with cliente(url) as c:
+        async def um(a: dict) -> None:
+            async with sem:
+                t0 = time.perf_counter()
+                r = await c.post("/score", json=a)
+                lat.append(time.perf_counter() - t0)
+                assert r.status_code == 200, r.text
+        t0 = time.perf_counter()
+        await asyncio.gather(*(um(a) for a in respostas))
+        total = time.perf_counter() - t0
+    resumo(f"POST /score (concorrência {concorrencia})", len(respostas), total, lat)
+
+async def bench_lote(url: str | None, respostas: List[dict]) -> None:
+    corpo = "".join(json.dumps(a, ensure_ascii=False) + "\n" for a in respostas).encode()
+    async with cliente(url) as c:
+        t0 = time.perf_counter()
+        n = 0
+        async with c.stream("POST", "/score/batch", content=corpo, headers={"content-type": "application/x-ndjson"}) as r:
+            async for linha in r.aiter_lines():
+                if linha: n += 1
+        total = time.perf_counter() - t0
+    assert n == len(respostas)
+    print(f"POST /score/batch: {n / total:10,.0f} respostas/s  ({n} linhas em {total:.2f}s)")
+
+def bench_streamlit(respostas: List[dict]) -> None:
+    from benchmarks.fluxo import completar_fluxo
+    lat = []
+    t0 = time.perf_counter()
+    for a in respostas:
+        t = time.perf_counter()
+        completar_fluxo(a, consentir=False)
+        lat.append(time.perf_counter() - t)
+    total = time.perf_counter() - t0
+    resumo("Streamlit (fluxo de 6 etapas pelo AppTest)", len(respostas), total, lat, "pessoas")
+    print(f"  média {statistics.mean(lat) * 1e3:.1f} ms por pessoa")
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--n", type=int, default=5_000)
+    p.add_argument("--concorrencia", type=int, default=64)
+    p.add_argument("--lote", type=int, default=50_000)
+    p.add_argument("--sessoes-streamlit", type=int, default=20)
+    p.add_argument("--url", help="servidor já em execução (padrão: cliente em processo via ASGITransport)")
+    args = p.parse_args()
+
+    asyncio.run(bench_score(args.url, gerar_respostas(args.n), args.concorrencia))
+    asyncio.run(bench_lote(args.url, gerar_respostas(args.lote, seed=7)))
+    if args.sessoes_streamlit: bench_streamlit(gerar_respostas(args.sessoes_streamlit, seed=3))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import io
+import json
+import time
+from typing import Callable, List
+
+from batch import evaluate_batch, write_results
+from rules import evaluate_rules
+from benchmarks.dados import gerar_respostas
+
+# Uso: python -m benchmarks.bench_batch --n 100000
+
+def melhor_de(rep: int, f: Callable[[], object]) -> float:
+    tempos = []
+    for _ in range(rep):
+        t0 = time.perf_counter(); f(); tempos.append(time.perf_counter() - t0)
+    return min(tempos)
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--n", type=int, default=100_000)
+    p.add_argument("--bloco", type=int, default=2_000)
+    p.add_argument("--rep", type=int, default=3)
+    args = p.parse_args()
+
+    rows = gerar_respostas(args.n)
+    linhas = [json.dumps(r, ensure_ascii=False) for r in rows]
+
+    # evaluate_rules grava idade no próprio dict, por isso cada rodada usa cópias
+    esperado = [evaluate_rules(dict(r)) for r in rows]
+    obtido: List = []
+    for i in range(0, len(rows), args.bloco): obtido.extend(evaluate_batch(rows[i:i + args.bloco]))
+    assert obtido == esperado, "resultado do lote diverge de evaluate_rules"
+
+    def por_linha_mem():
+        for r in rows: evaluate_rules(dict(r))
+
+    def lote_mem():
+        for i in range(0, len(rows), args.bloco): evaluate_batch(rows[i:i + args.bloco])
+
+    # Ponta a ponta: JSONL -> avaliação -> JSONL; o CLI (write_results) avalia linha a linha, sem colunas
+    def por_linha_jsonl():
+        out = io.StringIO()
+        for k, l in enumerate(linhas):
+            status, reasons = evaluate_rules(json.loads(l))
+            out.write(json.dumps({"row": k, "status": status, "reasons": reasons}, ensure_ascii=False) + "\n")
+
+    def cli_jsonl():
+        write_results(map(json.loads, linhas), io.StringIO())
+
+    excl = sum(s == "excluido" for s, _ in esperado)
+    print(f"linhas: {args.n}  excluídos: {excl}  (melhor de {args.rep})")
+    for nome, f_linha, f_lote, rotulo in [("em memória", por_linha_mem, lote_mem, "batch (colunas)"),
+                                          ("JSONL ponta a ponta", por_linha_jsonl, cli_jsonl, "CLI (batch.py)")]:
+        t_linha, t_lote = melhor_de(args.rep, f_linha), melhor_de(args.rep, f_lote)
+        print(f"{nome}:")
+        print(f"  {'evaluate_rules':15s}: {args.n / t_linha:12,.0f} linhas/s  ({t_linha:.3f}s)")
+        print(f"  {rotulo:15s}: {args.n / t_lote:12,.0f} linhas/s  ({t_lote:.3f}s)  x{t_linha / t_lote:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import Counter, defaultdict
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from tornado.websocket import websocket_connect
+
+from answers import Answers
+from questionario import RESPOSTAS, anos
+from rules import SEM_ALERGIA, evaluate_rules
+from benchmarks.dados import gerar_resposta
+
+# Uso: python -m benchmarks.bench_carga --niveis 1,2,4,8,16,32 --intakes 3 --limite-p95-ms 500
+#      python -m benchmarks.bench_carga --nav rerun --pensar 0.5 --json carga.json
+# Sobe `streamlit run app.py` num processo próprio (porta livre, banco temporário, VIALEVE_SCHED_URL num stub
+# local; nada sai da máquina) e abre sessões websocket concorrentes com asyncio, falando o protocolo do navegador
+# (/_stcore/stream, BackMsg/ForwardMsg). Cada sessão preenche as 6 etapas com respostas sorteadas e válidas — metade
+# no perfil elegível, metade com motivos de exclusão — e confere o resultado mostrado com evaluate_rules.
+# Para cada nível de concorrência: latência de ida e volta de cada etapa (envio do form -> fim da execução),
+# execuções do script por segundo e RSS máximo do servidor. A rampa para no nível em que o p95 passa do limite.
+
+ETAPAS = ["abrir"] + [f"etapa{e}" for e in range(6)]
+BOTAO = ["Continuar ▶️"] * 5 + ["Confirmar ✅"]
+ELEGIVEL = "Parabéns"  # st.success da etapa 5 no caminho elegível
+
+def percentil(xs: List[float], p: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100 * (len(xs) - 1))))]
+
+# -------- Servidor --------
+def porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0)); return s.getsockname()[1]
+
+def stub_agendamento() -> ThreadingHTTPServer:
+    # VIALEVE_SCHED_URL aponta para cá: o botão de agendamento nunca leva a um serviço externo
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            corpo = b"agendamento (stub local)"
+            self.send_response(200); self.send_header("Content-Length", str(len(corpo))); self.end_headers()
+            self.wfile.write(corpo)
+        def log_message(self, *args): pass
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, name="stub-agendamento", daemon=True).start()
+    return srv
+
+def iniciar_servidor(app: str, porta: int, env: Dict[str, str], log) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "streamlit", "run", app, "--server.headless", "true", "--server.address", "127.0.0.1",
+           "--server.port", str(porta), "--browser.gatherUsageStats", "false", "--server.fileWatcherType", "none",
+           "--server.runOnSave", "false", "--logger.level", "error"]
+    p = subprocess.Popen(cmd, env={**os.environ, **env}, stdout=log, stderr=subprocess.STDOUT)
+    sem_proxy = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+    prazo = time.monotonic() + 60
+    while time.monotonic() < prazo:
+        if p.poll() is not None: raise RuntimeError(f"streamlit saiu com código {p.returncode}:\n{_fim_do_log(log)}")
+        try:
+            with sem_proxy.open(f"http://127.0.0.1:{porta}/_stcore/health", timeout=1) as r:
+                if r.status == 200: return p
+        except OSError:
+            time.sleep(0.2)
+    p.terminate(); raise RuntimeError(f"streamlit não respondeu em 60 s:\n{_fim_do_log(log)}")
+
+def _fim_do_log(log) -> str:
+    log.flush()
+    with open(log.name, encoding="utf-8", errors="replace") as f: return f.read()[-2000:]
+
+def rss_mb(pid: int) -> float:
+    # Linux (/proc); em outros sistemas a coluna fica vazia
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for linha in f:
+                if linha.startswith("VmRSS:"): return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+# -------- Respostas --------
+def gerar_intake(rnd: random.Random, i: int) -> Dict[str, Any]:
+    if rnd.random() < 0.5:
+        # Perfil sem contraindicações: adulto, órgãos normais, sem alergias, comorbidade (IMC não exclui)
+        a = gerar_resposta(rnd, i, p_sim=0.0)
+        a.update(insuf_renal="normal", insuf_hepatica="normal", alergias_componentes=[SEM_ALERGIA], tem_comorbidades="sim",
+                 data_nascimento=date(rnd.randint(1955, 2000), rnd.randint(1, 12), rnd.randint(1, 28)).isoformat())
+    else:
+        a = gerar_resposta(rnd, i, p_sim=0.3)
+    a.update(aceite_termo=True, autoriza_teleconsulta=True, lgpd=True, veracidade=True)
+    return a
+
+def esperado(a: Dict[str, Any]) -> str:
+    return evaluate_rules(Answers.from_dict(a).to_dict())[0]
+
+def valores_etapa(etapa: int, a: Dict[str, Any]) -> Dict[str, Tuple[str, Any]]:
+    # Chave do widget -> (campo do WidgetState, valor), como o navegador envia ao submeter o form da etapa
+    v: Dict[str, Tuple[str, Any]] = {}
+    for p in RESPOSTAS[etapa]:
+        x = a.get(p.campo, p.padrao)
+        if p.widget == "selectbox": v[p.chave] = ("int_value", p.indice[x])
+        elif p.widget == "multiselect": v[p.chave] = ("int_array_value", [p.indice[o] for o in x])
+        elif p.widget == "numero": v[p.chave] = ("double_value", float(x))
+        elif p.widget == "slider": v[p.chave] = ("double_array_value", [float(x)])
+        elif p.widget == "checkbox": v[p.chave] = ("bool_value", bool(x))
+        else: v[p.chave] = ("string_value", x)
+    if etapa == 0:
+        d = date.fromisoformat(a["data_nascimento"])
+        v.update(w_dia=("int_value", d.day - 1), w_mes=("int_value", d.month - 1),
+                 w_ano=("int_value", anos(date.today().year)[1][d.year]))
+    return v
+
+# -------- Sessão websocket --------
+class Sessao:
+    # Um navegador: guarda os ids dos widgets da última execução e o que a tela mostrou
+    def __init__(self, ws):
+        self.ws = ws
+        self.ids: Dict[str, str] = {}  # "w_<campo>" ou rótulo do botão -> id do widget
+        self.alertas: List[str] = []
+        self.download_ativo = False
+        self.execucoes = 0
+        self.bytes = 0  # ForwardMsg recebidas (websocket sem compressão: é o que passa na rede)
+        self.query = ""  # query string que o app pôs na URL (st.query_params)
+
+    @classmethod
+    async def conectar(cls, porta: int) -> "Sessao":
+        return cls(await websocket_connect(f"ws://127.0.0.1:{porta}/_stcore/stream"))
+
+    def fechar(self) -> None:
+        self.ws.close()
+
+    def _limpar(self) -> None:
+        self.ids, self.alertas, self.download_ativo = {}, [], False
+
+    def _elemento(self, e) -> None:
+        tipo = e.WhichOneof("type")
+        w = getattr(e, tipo)
+        if tipo == "exception": raise RuntimeError(f"exceção no app: {w.type}: {w.message}")
+        if tipo == "alert": self.alertas.append(w.body)
+        elif tipo == "download_button": self.download_ativo = not w.disabled
+        if tipo == "button": self.ids[w.label] = w.id
+        elif getattr(w, "id", "").startswith("$$WIDGET_ID-"): self.ids[w.id.rsplit("-", 1)[1]] = w.id
+
+    async def executar(self, valores: Dict[str, Tuple[str, Any]], botao: str | None = None, query: str = "") -> float:
+        # Envia um rerun_script e espera a execução terminar; devolve o tempo de ida e volta
+        m = BackMsg()
+        m.rerun_script.query_string = query or self.query  # marca o rerun_script mesmo sem widgets (primeira execução)
+        widgets = m.rerun_script.widget_states.widgets
+        for chave, (campo, valor) in valores.items():
+            w = widgets.add(); w.id = self.ids[chave]
+            if campo.endswith("_array_value"): getattr(w, campo).data.extend(valor)
+            else: setattr(w, campo, valor)
+        if botao:
+            w = widgets.add(); w.id = self.ids[botao]; w.trigger_value = True
+        t0 = time.perf_counter()
+        await self.ws.write_message(m.SerializeToString(), binary=True)
+        self._limpar()
+        while True:
+            bruto = await self.ws.read_message()
+            if bruto is None: raise ConnectionError("websocket fechado pelo servidor")
+            self.bytes += len(bruto)
+            f = ForwardMsg.FromString(bruto)
+            tipo = f.WhichOneof("type")
+            if tipo == "delta" and f.delta.WhichOneof("type") == "new_element": self._elemento(f.delta.new_element)
+            elif tipo == "page_info_changed": self.query = f.page_info_changed.query_string
+            elif tipo == "script_finished":
+                self.execucoes += 1
+                # VIALEVE_NAV=rerun: a execução interrompida por st.rerun é seguida de outra
+                if f.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN: return time.perf_counter() - t0
+                self._limpar()
+
+async def intake(porta: int, a: Dict[str, Any], lat: Dict[str, List[float]], pensar: float, rnd: random.Random) -> Tuple[str, int]:
+    # Fluxo completo numa conexão nova; devolve (resultado mostrado, execuções do script)
+    s = await Sessao.conectar(porta)
+    try:
+        lat["abrir"].append(await s.executar({}))
+        for etapa in range(6):
+            if pensar: await asyncio.sleep(rnd.expovariate(1 / pensar))
+            lat[f"etapa{etapa}"].append(await s.executar(valores_etapa(etapa, a), BOTAO[etapa]))
+            proxima = RESPOSTAS[min(etapa + 1, 5)][0].chave
+            if proxima not in s.ids: raise RuntimeError(f"fluxo parou na etapa {etapa}: {s.alertas}")
+        if not s.download_ativo: raise RuntimeError("consentimento não foi registrado")
+        status = "potencialmente_elegivel" if any(ELEGIVEL in t for t in s.alertas) else "excluido"
+        return status, s.execucoes
+    finally:
+        s.fechar()
+
+async def nivel(porta: int, pid: int, concorrencia: int, intakes: List[Dict[str, Any]], pensar: float, seed: int) -> Dict[str, Any]:
+    lat: Dict[str, List[float]] = defaultdict(list)
+    caminhos: Counter = Counter()
+    erros: List[str] = []
+    execucoes = 0
+    rss = [rss_mb(pid)]
+    fim = asyncio.Event()
+
+    async def amostrar_rss():
+        while not fim.is_set():
+            rss.append(rss_mb(pid)); await asyncio.sleep(0.2)
+
+    async def usuario(k: int):
+        nonlocal execucoes
+        rnd = random.Random(seed * 1000 + k)
+        for a in intakes[k::concorrencia]:
+            try:
+                status, n = await intake(porta, a, lat, pensar, rnd)
+                execucoes += n
+                if status != esperado(a): erros.append(f"{a['nome']}: tela {status}, regras {esperado(a)}")
+                caminhos[status] += 1
+            except Exception as e:
+                erros.append(f"{a['nome']}: {e!r}")
+
+    amostrador = asyncio.create_task(amostrar_rss())
+    t0 = time.perf_counter()
+    await asyncio.gather(*(usuario(k) for k in range(concorrencia)))
+    total = time.perf_counter() - t0
+    fim.set(); await amostrador
+    transicoes = [x for e in ETAPAS[1:] for x in lat[e]]
+    return {
+        "concorrencia": concorrencia, "intakes": sum(caminhos.values()), "caminhos": dict(caminhos), "erros": erros,
+        "segundos": total, "execucoes_por_s": execucoes / total, "rss_max_mb": max(rss),
+        "p95_ms": percentil(transicoes, 95) * 1e3 if transicoes else float("nan"),
+        "etapas": {e: {p: percentil(lat[e], p) * 1e3 for p in (50, 95, 99)} for e in ETAPAS if lat[e]},
+    }
+
+def mostrar(r: Dict[str, Any]) -> None:
+    c = r["caminhos"]
+    print(f"\nconcorrência {r['concorrencia']}: {r['intakes']} intakes em {r['segundos']:.1f}s "
+          f"({c.get('potencialmente_elegivel', 0)} elegíveis, {c.get('excluido', 0)} excluídos, {len(r['erros'])} erros)  "
+          f"{r['execucoes_por_s']:.1f} execuções/s  RSS máx {r['rss_max_mb']:.0f} MB")
+    print(f"  {'':8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for e, ps in r["etapas"].items():
+        print(f"  {e:8} {ps[50]:9.1f} {ps[95]:9.1f} {ps[99]:9.1f}")
+    for erro in r["erros"][:5]: print(f"  ! {erro}")
+
+async def rampa(porta: int, pid: int, args) -> List[Dict[str, Any]]:
+    rnd = random.Random(args.seed)
+    # Aquecimento: primeira execução importa os módulos do app e compila o questionário
+    await intake(porta, gerar_intake(rnd, -1), defaultdict(list), 0, rnd)
+    print(f"servidor pronto: RSS {rss_mb(pid):.0f} MB")
+    resultados = []
+    for c in args.niveis:
+        intakes = [gerar_intake(rnd, i) for i in range(c * args.intakes)]
+        r = await nivel(porta, pid, c, intakes, args.pensar, args.seed)
+        mostrar(r); resultados.append(r)
+        if r["p95_ms"] > args.limite_p95_ms:
+            print(f"\np95 das etapas ({r['p95_ms']:.0f} ms) passou de {args.limite_p95_ms:.0f} ms com concorrência {c}")
+            break
+    else:
+        print(f"\np95 das etapas ficou abaixo de {args.limite_p95_ms:.0f} ms até concorrência {args.niveis[-1]}")
+    return resultados
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--app", default="app.py")
+    ap.add_argument("--niveis", type=lambda s: [int(x) for x in s.split(",")], default=[1, 2, 4, 8, 16, 32])
+    ap.add_argument("--intakes", type=int, default=3, help="fluxos completos por sessão concorrente em cada nível")
+    ap.add_argument("--limite-p95-ms", type=float, default=500)
+    ap.add_argument("--pensar", type=float, default=0.0, help="pausa média (s) entre etapas; 0 = sem pausa")
+    ap.add_argument("--nav", choices=["callback", "rerun"], default=os.environ.get("VIALEVE_NAV", "callback"))
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--json", help="grava os resultados de cada nível")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stub = stub_agendamento()
+        porta = porta_livre()
+        env = {"VIALEVE_DB": os.path.join(tmp, "carga.db"), "VIALEVE_NAV": args.nav,
+               "VIALEVE_SCHED_URL": f"http://127.0.0.1:{stub.server_port}/agendar"}
+        with open(os.path.join(tmp, "streamlit.log"), "w") as log:
+            srv = iniciar_servidor(args.app, porta, env, log)
+            try:
+                resultados = asyncio.run(rampa(porta, srv.pid, args))
+            finally:
+                srv.terminate(); srv.wait(10); stub.shutdown()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f: json.dump({"nav": args.nav, "niveis": resultados}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+from delivery import DeliveryQueue
+from benchmarks.bench_store import percentil, rodar
+
+# Uso: python -m benchmarks.bench_entrega --sessoes 50 --por-sessao 40 --atraso 0.5
+# Sessões concluindo ao mesmo tempo (uma thread por sessão, como o Streamlit) entregando a um CRM de mentira local:
+#   rápido       — vazão e tempo de submit() na thread do script
+#   lento        — destino demora --atraso s por requisição: submit() continua sem esperar, a fila enche e o excedente
+#                  vai para o disco; quando o destino volta ao normal, o transbordo é reenviado
+#   falhas       — 30% das requisições recebem 503: novas tentativas com backoff
+#   indisponível — destino fora do ar: tudo vai para o disco; quando volta, tudo é entregue
+# Em todos os cenários: cada id recebido exatamente uma vez.
+
+class StubCRM:
+    def __init__(self):
+        self.atraso, self.p_falha, self.fora = 0.0, 0.0, False
+        self.ids: Counter = Counter()
+        self.requisicoes = self.conexoes = 0
+        self.lock = threading.Lock()
+        stub = self
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            disable_nagle_algorithm = True  # cabeçalho e corpo saem em writes separados
+            def setup(self):
+                super().setup()
+                with stub.lock: stub.conexoes += 1
+            def do_POST(self):
+                corpo = self.rfile.read(int(self.headers["Content-Length"]))
+                if stub.atraso: time.sleep(stub.atraso)
+                with stub.lock: stub.requisicoes += 1
+                if stub.fora or random.random() < stub.p_falha:
+                    self.responder(503, b"indisponivel"); return
+                lote = json.loads(corpo)
+                with stub.lock: stub.ids.update(r["id"] for r in lote)
+                self.responder(200, b"ok")
+            def responder(self, codigo: int, corpo: bytes):
+                self.send_response(codigo); self.send_header("Content-Length", str(len(corpo))); self.end_headers()
+                self.wfile.write(corpo)
+            def log_message(self, *args): pass
+        self.srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.srv.daemon_threads = True
+        threading.Thread(target=self.srv.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.srv.server_port}/intakes"
+
+    def fechar(self) -> None:
+        self.srv.shutdown(); self.srv.server_close()
+
+def relatorio(nome: str, fila: DeliveryQueue, crm: StubCRM, total: int, t_total: float, lat: List[float]) -> None:
+    s = fila.stats()
+    repetidos = sum(n - 1 for n in crm.ids.values() if n > 1)
+    print(f"{nome}:")
+    print(f"  {total / t_total:10,.0f} entregas/s  ({len(crm.ids)}/{total} ids em {t_total:.2f}s; {repetidos} repetidos)")
+    print(f"  submit() na thread do script: p50 {percentil(lat, 50) * 1e6:.1f} µs  p99 {percentil(lat, 99) * 1e6:.1f} µs  máx {max(lat) * 1e3:.2f} ms")
+    print(f"  {s['requisicoes']} POSTs ({total / max(1, s['requisicoes']):.1f} registros/POST) em {crm.conexoes} conexões; "
+          f"{s['retentativas']} novas tentativas; {s['derramados']} registros passaram pelo disco")
+    assert len(crm.ids) == total and repetidos == 0, f"{nome}: {len(crm.ids)} de {total} ids, {repetidos} repetidos"
+
+def cenario(nome: str, d: str, args, preparar=None, normalizar=None, **kw) -> None:
+    crm = StubCRM()
+    if preparar: preparar(crm)
+    fila = DeliveryQueue(crm.url, os.path.join(d, f"{nome}.jsonl"), **kw)
+    total = args.sessoes * args.por_sessao
+    t0 = time.perf_counter()
+    lat = rodar(args.sessoes, args.por_sessao, lambda a: fila.submit(a, "potencialmente_elegivel"))
+    if normalizar:
+        fila.flush(120, disco=True)
+        normalizar(crm)
+    assert fila.flush(300), f"{nome}: entregas pendentes {fila.stats()}"
+    relatorio(nome, fila, crm, total, time.perf_counter() - t0, lat)
+    fila.close(); crm.fechar()
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--sessoes", type=int, default=50)
+    p.add_argument("--por-sessao", type=int, default=40)
+    p.add_argument("--atraso", type=float, default=0.5, help="segundos por requisição no cenário lento")
+    args = p.parse_args()
+
+    def lento(crm): crm.atraso = args.atraso
+    def falhas(crm): crm.p_falha = 0.3
+    def fora(crm): crm.fora = True
+    def normal(crm): crm.atraso, crm.fora = 0.0, False
+    with tempfile.TemporaryDirectory() as d:
+        cenario("rápido", d, args)
+        cenario("lento", d, args, lento, normal, maxsize=200)
+        cenario("falhas", d, args, falhas, backoff=0.05, tentativas=8)
+        cenario("indisponível", d, args, fora, normal, tentativas=2, backoff=0.05, backoff_max=0.5)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import os
+import statistics
+import tempfile
+import timeit
+
+from answers import Answers
+from metrics import METRICS
+from questionario import desenhar_perguntas
+from benchmarks.legado import desenhar_etapa_legado
+from benchmarks.dados import gerar_respostas
+from benchmarks.fluxo import completar_fluxo
+
+# Uso: git show <rev>:app.py > app_antes.py
+#      python -m benchmarks.bench_etapas --apps app_antes.py app.py --sessoes 30
+# 1) Trabalho Python do app por etapa (montar opções, índices e valores), com um substituto do st que não desenha
+#    nada: desenho original (benchmarks/legado.py) x questionário.
+# 2) Tempo do bloco de cada etapa no AppTest (histograma vialeve_step_render_seconds do próprio app), por versão do
+#    app; inclui o custo dos widgets do Streamlit. As versões se alternam sessão a sessão.
+
+class _UI:
+    # Aceita as chamadas de widget/layout que as etapas fazem e não faz nada
+    def __getattr__(self, nome):
+        return lambda *a, **k: None
+    def columns(self, spec):
+        return [self] * (spec if isinstance(spec, int) else len(spec))
+    def __enter__(self): return self
+    def __exit__(self, *exc): pass
+
+def trabalho_python(n: int = 20_000) -> None:
+    ui, a = _UI(), Answers.from_dict({**gerar_respostas(1)[0], "insuf_renal": "leve"})
+    print(f"trabalho Python do app por execução (sem desenhar), µs:")
+    print("  etapa       original   questionário   variação")
+    for e in range(6):
+        antes = timeit.timeit(lambda: desenhar_etapa_legado(ui, e, a), number=n) / n * 1e6
+        depois = timeit.timeit(lambda: desenhar_perguntas(ui, e, a), number=n) / n * 1e6
+        print(f"  {e:5d} {antes:14.2f} {depois:14.2f}   {(depois / antes - 1) * 100:+7.1f}%")
+
+def blocos_por_etapa() -> dict:
+    _, hist = METRICS.snapshot()
+    return {dict(labels)["etapa"]: (v[-1], sum(v[:-1])) for (nome, labels), v in hist.items() if nome == "vialeve_step_render_seconds"}
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--apps", nargs="+", default=["app.py"])
+    p.add_argument("--sessoes", type=int, default=30, help="sessões no AppTest (0: só o trabalho Python)")
+    args = p.parse_args()
+
+    trabalho_python()
+    if not args.sessoes: return
+
+    os.environ.setdefault("VIALEVE_DB", os.path.join(tempfile.mkdtemp(), "etapas.db"))
+    respostas = gerar_respostas(args.sessoes, p_sim=0.05)
+    for app in args.apps: completar_fluxo(respostas[0], app=app)  # aquecimento
+    medidas = {app: {} for app in args.apps}  # app -> etapa -> [ms por sessão]
+    for r in respostas:
+        for app in args.apps:
+            METRICS.reset()
+            completar_fluxo(r, app=app)
+            for etapa, (soma, n) in blocos_por_etapa().items():
+                medidas[app].setdefault(etapa, []).append(soma / n * 1e3)
+
+    etapas = sorted(medidas[args.apps[0]])
+    print(f"\nbloco de cada etapa no AppTest, mediana de {args.sessoes} sessões (ms):")
+    print("  etapa " + "".join(f"{os.path.basename(a):>16s}" for a in args.apps) + ("        variação" if len(args.apps) > 1 else ""))
+    for e in etapas:
+        med = [statistics.median(medidas[a][e]) for a in args.apps]
+        linha = f"  {e:5s} " + "".join(f"{m:16.3f}" for m in med)
+        if len(med) > 1: linha += f"  {(med[-1] / med[0] - 1) * 100:+13.1f}%"
+        print(linha)
+
+if __name__ == "__main__":
+    main()
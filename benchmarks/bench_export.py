@@ -0,0 +1,59 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+from export import answers_to_json, export_csv, export_ndjson
+from rules import evaluate_rules
+from store import SubmissionStore
+from benchmarks.dados import gerar_respostas
+
+# Uso: python -m benchmarks.bench_export --n 100000
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--n", type=int, default=100_000)
+    p.add_argument("--bloco", type=int, default=1_000)
+    args = p.parse_args()
+
+    # Serializador do botão de download: str() (antes), JSON canônico e JSON já guardado por versão
+    a = gerar_respostas(1)[0]
+    evaluate_rules(a)
+    a.update({"aceite_termo": True, "autoriza_teleconsulta": True, "lgpd": True, "veracidade": True})
+    cache = {"v": (1, answers_to_json(a))}
+    k = 20_000
+    print("download (por reexecução da etapa 5):")
+    print(f"  str(answers)           {timeit.timeit(lambda: str(a), number=k) / k * 1e6:7.2f} µs")
+    print(f"  answers_to_json        {timeit.timeit(lambda: answers_to_json(a), number=k) / k * 1e6:7.2f} µs")
+    print(f"  cache por versão       {timeit.timeit(lambda: cache['v'][0] == 1 and cache['v'][1], number=k) / k * 1e6:7.2f} µs")
+
+    with tempfile.TemporaryDirectory() as d:
+        db = os.path.join(d, "export.db")
+        store = SubmissionStore(db)
+        for r in gerar_respostas(args.n):
+            status, reasons = evaluate_rules(r)
+            store.submit(r, status, reasons)
+        store.close()
+
+        con = sqlite3.connect(db)
+        print(f"\nexportação em massa ({args.n} registros, blocos de {args.bloco}):")
+        for nome, f, ext in [("NDJSON", export_ndjson, "ndjson"), ("CSV", export_csv, "csv")]:
+            caminho = os.path.join(d, f"saida.{ext}")
+            t0 = time.perf_counter()
+            with open(caminho, "w", encoding="utf-8", newline="") as out:
+                n = f(con, out, bloco=args.bloco)
+            t = time.perf_counter() - t0
+            assert n == args.n
+            # Segunda passada só para medir o pico de memória (o tracemalloc deixa tudo mais lento)
+            tracemalloc.start()
+            with open(caminho, "w", encoding="utf-8", newline="") as out: f(con, out, bloco=args.bloco)
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"  {nome:7s} {n / t:10,.0f} registros/s  ({t:.2f}s, {os.path.getsize(caminho) / 1e6:.1f} MB, pico de memória {pico / 1e6:.2f} MB)")
+        con.close()
+
+if __name__ == "__main__":
+    main()
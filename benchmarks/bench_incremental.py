@@ -0,0 +1,87 @@
+import argparse
+import random
+import time
+
+from answers import Answers
+from questionario import RESPOSTAS
+from rules import REGRAS, IncrementalEvaluation, evaluate_rules
+from benchmarks.dados import gerar_respostas
+
+# Uso: python -m benchmarks.bench_incremental --sessoes 5000 --repetidos 0.3
+# Sessões simuladas etapa a etapa (mesma divisão de campos do questionário), com algumas voltas para corrigir
+# respostas. Compara a avaliação completa a cada gravação com a incremental (só as regras dos campos alterados),
+# confere o resultado contra evaluate_rules em toda gravação e compara, na avaliação final, ler o resultado pronto
+# da incremental com avaliar o perfil inteiro.
+
+def gravacoes(r, rnd: random.Random):
+    # Sequência de dicts gravados pela sessão: etapas 0–4 e, às vezes, uma volta para mudar peso ou um sim/não
+    for e in range(5):
+        yield {p.campo: r[p.campo] for p in RESPOSTAS[e] if p.campo in r} | ({"data_nascimento": r["data_nascimento"]} if e == 0 else {})
+    if rnd.random() < 0.3:
+        yield {"peso": r["peso"] + rnd.choice([-10, 10])}
+        yield {"gravidez": rnd.choice(["sim", "nao"])}
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--sessoes", type=int, default=5_000)
+    p.add_argument("--repetidos", type=float, default=0.3, help="fração de sessões que repetem um perfil já visto")
+    args = p.parse_args()
+
+    rnd = random.Random(7)
+    base = gerar_respostas(args.sessoes, p_sim=0.05)
+    perfis = [dict(rnd.choice(base[:i])) if i and rnd.random() < args.repetidos else base[i] for i in range(args.sessoes)]
+    sequencias = [list(gravacoes(r, random.Random(i))) for i, r in enumerate(perfis)]
+
+    # Conferência: incremental == avaliação completa depois de cada gravação
+    for seq in sequencias:
+        a, inc = Answers(), IncrementalEvaluation()
+        for novos in seq:
+            inc.atualizar(a, a.update(novos))
+            assert inc.resultado() == evaluate_rules(a.to_dict())
+
+    def completa():
+        for seq in sequencias:
+            a = Answers()
+            for novos in seq:
+                a.update(novos); evaluate_rules(a.to_dict())
+
+    checadas = 0
+    def incremental():
+        nonlocal checadas
+        for seq in sequencias:
+            a, inc = Answers(), IncrementalEvaluation()
+            for novos in seq: inc.atualizar(a, a.update(novos))
+            checadas += inc.checadas
+
+    def so_gravar():
+        for seq in sequencias:
+            a = Answers()
+            for novos in seq: a.update(novos)
+
+    tempos = {}
+    for nome, f in [("só gravar", so_gravar), ("completa a cada gravação", completa), ("incremental", incremental)]:
+        t0 = time.perf_counter(); f(); tempos[nome] = time.perf_counter() - t0
+    n_grav = sum(map(len, sequencias))
+    print(f"{args.sessoes} sessões, {n_grav} gravações de respostas:")
+    for nome, t in tempos.items():
+        extra = t - tempos["só gravar"]
+        print(f"  {nome:26s} {t / n_grav * 1e6:7.2f} µs/gravação" + (f"  (regras: {extra / n_grav * 1e6:6.2f} µs)" if nome != "só gravar" else ""))
+    print(f"  regras checadas: {checadas} de {n_grav * len(REGRAS)} ({checadas / (n_grav * len(REGRAS)) * 100:.0f}%)")
+
+    # Avaliação final (fim da etapa 4): o app lê o resultado da incremental; o /score avalia o perfil inteiro
+    finais = []
+    for seq in sequencias:
+        a, inc = Answers(), IncrementalEvaluation()
+        for novos in seq: inc.atualizar(a, a.update(novos))
+        finais.append((a, inc))
+    t0 = time.perf_counter()
+    for a, _ in finais: evaluate_rules(a.to_dict())
+    t_sem = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for _, inc in finais: inc.resultado()
+    t_inc = time.perf_counter() - t0
+    print(f"avaliação final: {t_inc / len(finais) * 1e6:.2f} µs/sessão lendo a incremental (app) "
+          f"x {t_sem / len(finais) * 1e6:.2f} µs com evaluate_rules")
+
+if __name__ == "__main__":
+    main()
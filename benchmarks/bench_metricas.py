@@ -0,0 +1,58 @@
+import argparse
+import os
+import tempfile
+import time
+import timeit
+import urllib.request
+
+from metrics import METRICS, Metrics, serve
+from benchmarks.dados import gerar_respostas
+from benchmarks.fluxo import completar_fluxo
+
+# Uso: python -m benchmarks.bench_metricas --sessoes 10
+# Custo da instrumentação por execução do script x tempo do bloco de cada etapa (meta: < 1%).
+
+def custo_por_execucao(n: int = 100_000) -> float:
+    # O que o app faz a cada execução: entrada/saída do funil (pior caso: as duas) e o tempo do bloco da etapa;
+    # a avaliação das regras (timer, status e motivos) acontece uma vez por sessão e também entra aqui, por cima
+    m = Metrics()
+    def execucao():
+        m.inc("vialeve_step_exit_total", etapa="3", destino="4")
+        m.inc("vialeve_step_enter_total", etapa="4")
+        with m.timer("vialeve_rules_seconds"): pass
+        m.inc("vialeve_eligibility_total", status="excluido")
+        m.inc("vialeve_exclusion_reason_total", regra="gravidez")
+        m.observe("vialeve_step_render_seconds", 0.004, etapa="4")
+    return timeit.timeit(execucao, number=n) / n
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--sessoes", type=int, default=10)
+    args = p.parse_args()
+
+    os.environ.setdefault("VIALEVE_DB", os.path.join(tempfile.mkdtemp(), "metricas.db"))
+    respostas = gerar_respostas(args.sessoes, p_sim=0.05)
+    completar_fluxo(respostas[0])
+    METRICS.reset()
+    t0 = time.perf_counter()
+    for r in respostas: completar_fluxo(r)
+    total = time.perf_counter() - t0
+
+    _, hist = METRICS.snapshot()
+    blocos = [v for (nome, _), v in hist.items() if nome == "vialeve_step_render_seconds"]
+    execucoes = sum(sum(v[:-1]) for v in blocos)
+    bloco = sum(v[-1] for v in blocos) / execucoes
+    custo = custo_por_execucao()
+    print(f"{args.sessoes} sessões, {execucoes} execuções")
+    print(f"  bloco da etapa (média)     {bloco * 1e3:8.3f} ms")
+    print(f"  execução inteira (AppTest) {total / execucoes * 1e3:8.3f} ms")
+    print(f"  instrumentação/execução    {custo * 1e6:8.2f} µs  = {custo / bloco * 100:.3f}% do bloco, {custo / (total / execucoes) * 100:.4f}% da execução")
+
+    srv = serve(0)
+    with urllib.request.urlopen(f"http://127.0.0.1:{srv.server_address[1]}/metrics") as resp:
+        texto = resp.read().decode()
+    srv.shutdown()
+    print(f"  /metrics: {len(texto.splitlines())} linhas, ex.: {next(l for l in texto.splitlines() if l.startswith('vialeve_step_enter_total'))}")
+
+if __name__ == "__main__":
+    main()
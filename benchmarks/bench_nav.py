@@ -0,0 +1,35 @@
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.dados import gerar_respostas
+from benchmarks.fluxo import completar_fluxo
+
+# Uso: python -m benchmarks.bench_nav --sessoes 10
+# Execuções do script por pré-triagem completa: navegação por callback (padrão) x st.rerun (modo antigo)
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--sessoes", type=int, default=10)
+    args = p.parse_args()
+
+    respostas = gerar_respostas(args.sessoes, seed=7)
+    os.environ.setdefault("VIALEVE_DB", os.path.join(tempfile.mkdtemp(), "nav.db"))
+    print(f"{args.sessoes} pré-triagens completas (6 etapas + consentimento):")
+    for modo in ("rerun", "callback"):
+        os.environ["VIALEVE_NAV"] = modo
+        execucoes, tempos, status = [], [], []
+        for r in respostas:
+            t0 = time.perf_counter()
+            f = completar_fluxo(r)
+            tempos.append(time.perf_counter() - t0)
+            execucoes.append(f["at"].session_state.script_runs)
+            status.append((f["eligibility"], f["reasons"], f["consent_ok"]))
+        if modo == "rerun": referencia = status
+        else: assert status == referencia, "os dois modos devem chegar ao mesmo resultado"
+        print(f"  {modo:8s} {statistics.mean(execucoes):5.1f} execuções/sessão  {statistics.mean(tempos) * 1e3:7.1f} ms/sessão (AppTest)")
+
+if __name__ == "__main__":
+    main()
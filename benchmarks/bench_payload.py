@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import os
+import random
+import re
+import subprocess
+import tempfile
+import urllib.request
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from questionario import RESPOSTAS
+from benchmarks.bench_carga import (BOTAO, ETAPAS, Sessao, gerar_intake, iniciar_servidor, porta_livre, stub_agendamento,
+                                    valores_etapa)
+
+# Uso: python -m benchmarks.bench_payload --antes <commit com o CSS/SVG inline> --intakes 5
+# Bytes que o servidor manda pelo websocket a cada troca de etapa (ForwardMsg; a compressão do websocket vem desligada
+# no Streamlit), fluxo completo com as mesmas respostas em cada versão do app. --antes é um commit ou um arquivo: o app
+# daquela versão roda com os módulos da árvore atual. Também baixa uma vez os arquivos estáticos que a página
+# referencia (/media/...) e mostra tamanho, Content-Type e Cache-Control: é o custo da primeira visita, que o
+# navegador não repete enquanto a URL (hash do conteúdo) não mudar.
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+URL_MEDIA = re.compile(r"/media/[0-9a-f]+\.\w+\?v=\w+")
+
+class SessaoMedida(Sessao):
+    def __init__(self, ws):
+        super().__init__(ws)
+        self.markdown = 0  # bytes dos corpos de st.markdown
+        self.urls: set = set()
+
+    def _elemento(self, e) -> None:
+        super()._elemento(e)
+        if e.WhichOneof("type") == "markdown":
+            self.markdown += len(e.markdown.body.encode())
+            self.urls.update(URL_MEDIA.findall(e.markdown.body))
+
+async def fluxo(porta: int, a: Dict[str, Any], medidas: Dict[str, List[int]], urls: set) -> None:
+    s = await SessaoMedida.conectar(porta)
+    try:
+        for i, nome in enumerate(ETAPAS):
+            antes, md = s.bytes, s.markdown
+            if i == 0: await s.executar({})
+            else: await s.executar(valores_etapa(i - 1, a), BOTAO[i - 1])
+            medidas[nome].append(s.bytes - antes); medidas[nome + ":markdown"].append(s.markdown - md)
+            if i < 6 and RESPOSTAS[i][0].chave not in s.ids: raise RuntimeError(f"fluxo parou em {nome}: {s.alertas}")
+        urls.update(s.urls)
+    finally:
+        s.fechar()
+
+def baixar(porta: int, url: str) -> Dict[str, Any]:
+    sem_proxy = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+    with sem_proxy.open(f"http://127.0.0.1:{porta}{url}", timeout=5) as r:
+        return {"url": url, "bytes": len(r.read()), "tipo": r.headers.get("Content-Type"), "cache": r.headers.get("Cache-Control")}
+
+def medir(app: str, intakes: List[Dict[str, Any]], tmp: str, nome: str) -> Dict[str, Any]:
+    stub, porta = stub_agendamento(), porta_livre()
+    env = {"VIALEVE_DB": os.path.join(tmp, f"{nome}.db"), "VIALEVE_SCHED_URL": f"http://127.0.0.1:{stub.server_port}/agendar",
+           "PYTHONPATH": RAIZ + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    medidas: Dict[str, List[int]] = defaultdict(list)
+    urls: set = set()
+    with open(os.path.join(tmp, f"{nome}.log"), "w") as log:
+        srv = iniciar_servidor(app, porta, env, log)
+        try:
+            async def todos():
+                for a in intakes: await fluxo(porta, a, medidas, urls)
+            asyncio.run(todos())
+            estaticos = [baixar(porta, u) for u in sorted(urls)]
+        finally:
+            srv.terminate(); srv.wait(10); stub.shutdown()
+    return {"medidas": medidas, "estaticos": estaticos}
+
+def versao_anterior(antes: str, tmp: str) -> str:
+    if os.path.exists(antes): return os.path.abspath(antes)
+    caminho = os.path.join(tmp, "app_antes.py")
+    with open(caminho, "wb") as f: f.write(subprocess.run(["git", "show", f"{antes}:app.py"], cwd=RAIZ, check=True, capture_output=True).stdout)
+    return caminho
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--app", default=os.path.join(RAIZ, "app.py"))
+    ap.add_argument("--antes", help="commit (ou arquivo) com a versão anterior do app para comparar")
+    ap.add_argument("--intakes", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    rnd = random.Random(args.seed)
+    intakes = [gerar_intake(rnd, i) for i in range(args.intakes)]
+    with tempfile.TemporaryDirectory() as tmp:
+        versoes = {"depois": args.app}
+        if args.antes: versoes = {"antes": versao_anterior(args.antes, tmp), **versoes}
+        res = {nome: medir(app, intakes, tmp, nome) for nome, app in versoes.items()}
+
+    media = lambda xs: sum(xs) / len(xs)
+    trocas = ETAPAS[1:]
+    por_etapa = lambda r, chaves, k="": media([media(r["medidas"][c + k]) for c in chaves])
+    print(f"bytes recebidos pelo navegador por execução (média de {args.intakes} fluxos; entre parênteses, corpos de st.markdown)")
+    print(f"  {'':12}" + "".join(f"{v:>22}" for v in res))
+    for rotulo, chaves in [(e, [e]) for e in ETAPAS] + [("média/troca", trocas)]:
+        print(f"  {rotulo:12}" + "".join(f"{por_etapa(r, chaves):>13,.0f} ({por_etapa(r, chaves, ':markdown'):>6,.0f})" for r in res.values()))
+    if "antes" in res:
+        a, d = por_etapa(res["antes"], trocas), por_etapa(res["depois"], trocas)
+        print(f"  troca de etapa: {a - d:,.0f} bytes a menos ({1 - d / a:.0%})")
+    for nome, r in res.items():
+        for e in r["estaticos"]:
+            print(f"  {nome}: {e['url']}  {e['bytes']:,} bytes  {e['tipo']}  Cache-Control: {e['cache']}")
+        if not r["estaticos"]: print(f"  {nome}: nenhum arquivo estático referenciado")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+import streamlit
+
+import rules
+from benchmarks.dados import gerar_respostas
+from benchmarks.fluxo import completar_fluxo
+
+# Uso: python -m benchmarks.bench_render --sessoes 20 --json render.json
+#      python -m benchmarks.bench_render --comparar render.json              (outra versão do app)
+#      python -m benchmarks.bench_render --escala 1,10,50,100     (memória com N sessões vivas)
+# Mede, pelo AppTest, o tempo de cada execução do fluxo (etapas 0–5 e o envio do consentimento), o tempo gasto
+# nas regras (por sessão) e o pico de memória (tracemalloc) de uma sessão. O JSON serve para comparar versões.
+
+ETAPAS = ["etapa0", "etapa1", "etapa2", "etapa3", "etapa4", "etapa5", "consentimento"]
+
+class _Cronometro:
+    # Troca obj.nome por uma versão cronometrada (o app importa os nomes a cada execução)
+    def __init__(self, obj, nome: str):
+        self.obj, self.nome, self.original, self.tempos = obj, nome, getattr(obj, nome), []
+    def __enter__(self):
+        original, tempos = self.original, self.tempos
+        def cronometrado(*args, **kwargs):
+            t0 = time.perf_counter()
+            try: return original(*args, **kwargs)
+            finally: tempos.append(time.perf_counter() - t0)
+        setattr(self.obj, self.nome, cronometrado); return self
+    def __exit__(self, *exc):
+        setattr(self.obj, self.nome, self.original)
+
+def _resumo(valores: List[float], escala: float = 1e3) -> Dict[str, float]:
+    v = sorted(valores)
+    return {"n": len(v), "media": statistics.mean(v) * escala, "mediana": statistics.median(v) * escala,
+            "p95": v[min(len(v) - 1, int(len(v) * 0.95))] * escala, "min": v[0] * escala, "max": v[-1] * escala}
+
+def medir_tempos(respostas: List[Dict[str, Any]]) -> Dict[str, Any]:
+    por_etapa: Dict[str, List[float]] = {e: [] for e in ETAPAS}
+    execucoes, regras = [], []
+    # Regras: avaliação incremental a cada gravação de respostas (o resultado final é só lido)
+    with _Cronometro(rules.IncrementalEvaluation, "atualizar") as inc:
+        for r in respostas:
+            antes = sum(inc.tempos)
+            f = completar_fluxo(r)
+            regras.append(sum(inc.tempos) - antes)
+            for e, t in zip(ETAPAS, f["tempos"]): por_etapa[e].append(t)
+            execucoes.append(f["at"].session_state.script_runs)
+    return {"etapas_ms": {e: _resumo(v) for e, v in por_etapa.items()},
+            "regras_us": _resumo(regras, 1e6),
+            "execucoes_por_sessao": statistics.mean(execucoes)}
+
+def medir_pico(respostas: List[Dict[str, Any]]) -> Dict[str, float]:
+    # Pico de memória alocada durante uma sessão completa (tracemalloc deixa o fluxo bem mais lento)
+    picos = []
+    tracemalloc.start()
+    for r in respostas:
+        gc.collect(); tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        completar_fluxo(r)
+        picos.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return _resumo(picos, 1 / 1024)
+
+def medir_escala(respostas: List[Dict[str, Any]], niveis: List[int]) -> List[Dict[str, float]]:
+    # Mantém N sessões completas vivas (como o servidor mantém o session_state de cada aba) e mede a memória retida
+    vivas, saida = [], []
+    tracemalloc.start()
+    gc.collect(); base = tracemalloc.get_traced_memory()[0]
+    for n in niveis:
+        while len(vivas) < n:
+            vivas.append(completar_fluxo(respostas[len(vivas) % len(respostas)])["at"])
+        gc.collect()
+        atual = tracemalloc.get_traced_memory()[0] - base
+        saida.append({"sessoes": n, "retido_kb": atual / 1024, "kb_por_sessao": atual / 1024 / n})
+    tracemalloc.stop()
+    return saida
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--sessoes", type=int, default=20, help="sessões cronometradas")
+    p.add_argument("--sessoes-memoria", type=int, default=5, help="sessões medidas com tracemalloc")
+    p.add_argument("--escala", default="", help="lista de N sessões vivas, ex.: 1,10,50,100 (omitido: não mede)")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--json", help="grava os resultados neste arquivo")
+    p.add_argument("--comparar", help="JSON de uma execução anterior: mostra a variação das medianas")
+    args = p.parse_args()
+
+    os.environ.setdefault("VIALEVE_DB", os.path.join(tempfile.mkdtemp(), "render.db"))
+    respostas = gerar_respostas(max(args.sessoes, args.sessoes_memoria), seed=args.seed, p_sim=0.05)
+    completar_fluxo(respostas[0])  # aquece imports e caches do Streamlit
+
+    res: Dict[str, Any] = {
+        "ambiente": {"python": platform.python_version(), "streamlit": streamlit.__version__,
+                     "nav": os.environ.get("VIALEVE_NAV", "callback"), "seed": args.seed},
+        **medir_tempos(respostas[:args.sessoes]),
+        "pico_sessao_kb": medir_pico(respostas[:args.sessoes_memoria]),
+    }
+    if args.escala:
+        res["escala"] = medir_escala(respostas, [int(n) for n in args.escala.split(",")])
+
+    print(f"{args.sessoes} sessões ({res['execucoes_por_sessao']:.0f} execuções do script cada), tempo por execução:")
+    for e, s in res["etapas_ms"].items():
+        print(f"  {e:14s} mediana {s['mediana']:7.1f} ms   p95 {s['p95']:7.1f} ms")
+    s = res["regras_us"]
+    print(f"regras por sessão (incremental): mediana {s['mediana']:.1f} µs")
+    print(f"pico de memória por sessão: mediana {res['pico_sessao_kb']['mediana']:,.0f} KiB")
+    for linha in res.get("escala", []):
+        print(f"  {linha['sessoes']:5d} sessões vivas: {linha['retido_kb']:10,.0f} KiB  ({linha['kb_por_sessao']:,.1f} KiB/sessão)")
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f: base = json.load(f)
+        print(f"variação em relação a {args.comparar}:")
+        pares = [(e, base["etapas_ms"].get(e), res["etapas_ms"][e]) for e in ETAPAS]
+        pares += [("regras", base.get("regras_us", base.get("evaluate_rules_us")), res["regras_us"]), ("pico_sessao", base.get("pico_sessao_kb"), res["pico_sessao_kb"])]
+        for nome, antes, agora in pares:
+            if antes: print(f"  {nome:14s} {(agora['mediana'] / antes['mediana'] - 1) * 100:+6.1f}%")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f: json.dump(res, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import replay
+from rules import REGRAS
+from benchmarks.dados import gerar_respostas
+
+# Uso: python -m benchmarks.bench_replay --linhas 300000 --processos 1,2,4
+# Histórico sintético (JSONL) reavaliado com as regras atuais (A) e uma versão candidata (B: IMC < 30 e rim "leve"
+# também exclui). Mede respostas/s por número de processos e testa a retomada: o replay é morto (SIGKILL) no meio,
+# roda de novo com a mesma saída e o relatório tem de sair igual ao de uma execução sem interrupção.
+
+def regras_v2():
+    v2 = []
+    for r in REGRAS:
+        if r[0] == "imc": r = (r[0], r[1], 30, "IMC < 30 sem comorbidades relevantes.", *r[4:])
+        elif r[0] == "insuf_renal": r = (r[0], r[1], ("leve", "moderada", "grave"), r[3])
+        v2.append(r)
+    return v2
+
+def escrever_corpus(caminho: str, n: int) -> None:
+    with open(caminho, "w", encoding="utf-8") as f:
+        for i in range(0, n, 50_000):
+            f.writelines(json.dumps(a, ensure_ascii=False) + "\n" for a in gerar_respostas(min(50_000, n - i), seed=i))
+
+def sem_tempo(rel):
+    return {k: v for k, v in rel.items() if k != "segundos"}
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--linhas", type=int, default=300_000)
+    p.add_argument("--processos", type=lambda s: [int(x) for x in s.split(",")], default=[1, 2, 4])
+    p.add_argument("--bloco-mb", type=float, default=4)
+    args = p.parse_args()
+    bloco = int(args.bloco_mb * (1 << 20))
+
+    with tempfile.TemporaryDirectory() as d:
+        corpus, v2 = os.path.join(d, "historico.jsonl"), os.path.join(d, "v2.json")
+        escrever_corpus(corpus, args.linhas)
+        replay.exportar_regras(v2, regras_v2())
+        print(f"{args.linhas} respostas ({os.path.getsize(corpus) / 1e6:.0f} MB), {os.cpu_count()} núcleos")
+
+        base = None
+        for n in args.processos:
+            rel = replay.replay(corpus, os.path.join(d, f"saida{n}"), "atual", v2, n, bloco, id_field="email", recomecar=True)
+            base = base or rel
+            assert sem_tempo(rel) == sem_tempo(base)
+            print(f"  {n} processo(s): {rel['linhas'] / rel['segundos']:10,.0f} respostas/s  ({rel['segundos']:.2f}s; "
+                  f"{base['segundos'] / rel['segundos']:.2f}x)")
+        print(f"  viradas: {base['viradas']}")
+        for m, c in base["motivos"].items(): print(f"    +{c['entraram']:<7} -{c['sairam']:<7} {m}")
+
+        # Retomada: mata o processo depois de algumas faixas e roda de novo
+        saida = os.path.join(d, "retomada")
+        cmd = [sys.executable, "-m", "replay", corpus, "-o", saida, "--regras-b", v2, "-j", str(args.processos[-1]),
+               "--bloco-mb", str(args.bloco_mb), "--id", "email"]
+        proc = subprocess.Popen(cmd, stderr=subprocess.DEVNULL, start_new_session=True)
+        checkpoint = os.path.join(saida, "checkpoint.jsonl")
+        while proc.poll() is None and (not os.path.exists(checkpoint) or os.path.getsize(checkpoint) == 0): time.sleep(0.05)
+        time.sleep(base["segundos"] / 4)
+        os.killpg(proc.pid, signal.SIGKILL); proc.wait()
+        feitas = len(replay._ler_checkpoint(checkpoint))
+        total = len(replay.faixas(corpus, bloco))
+        rel = replay.replay(corpus, saida, "atual", v2, args.processos[-1], bloco, id_field="email")
+        assert sem_tempo(rel) == sem_tempo(base), "relatório da execução retomada difere"
+        print(f"retomada: {feitas}/{total} faixas já estavam no checkpoint; o resto levou {rel['segundos']:.2f}s; relatório igual")
+
+if __name__ == "__main__":
+    main()
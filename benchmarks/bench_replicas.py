@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, List
+from urllib.parse import parse_qs
+
+from questionario import RESPOSTAS
+from benchmarks.bench_carga import (BOTAO, ELEGIVEL, Sessao, esperado, gerar_intake, iniciar_servidor, percentil, porta_livre,
+                                    rss_mb, stub_agendamento, valores_etapa)
+
+# Uso: python -m benchmarks.bench_replicas --replicas 1,2,4 --concorrencia 8 --intakes 3
+# Sobe N processos `streamlit run app.py` (portas diferentes) que compartilham o estado das sessões
+# (VIALEVE_SESSION_BACKEND=sqlite:<arquivo temporário>) e o banco de submissões, e reparte as sessões entre eles sem
+# afinidade: cada fluxo começa numa réplica e, depois da etapa --troca, a conexão é fechada e o fluxo continua em
+# outra réplica só com o token da URL (?t=...), como um balanceador sem sticky session ou uma réplica que caiu.
+# Confere que a retomada cai na etapa certa, que o resultado mostrado bate com evaluate_rules e que o consentimento
+# foi registrado. Mede pré-triagens concluídas por segundo e latência das etapas com --concorrencia sessões por réplica.
+# Cada réplica é um processo (um núcleo no máximo): o ganho de vazão depende de haver núcleos livres.
+
+async def intake(portas: List[int], k: int, a: Dict[str, Any], troca: int, lat: List[float]) -> str:
+    s = await Sessao.conectar(portas[k % len(portas)])
+    try:
+        lat.append(await s.executar({}))
+        token = parse_qs(s.query).get("t", [""])[0]
+        if not token: raise RuntimeError("o app não pôs o token na URL (VIALEVE_SESSION_BACKEND definido?)")
+        for etapa in range(6):
+            if etapa == troca + 1:
+                s.fechar()
+                s = await Sessao.conectar(portas[(k + 1) % len(portas)])
+                lat.append(await s.executar({}, query=f"t={token}"))
+                if RESPOSTAS[etapa][0].chave not in s.ids: raise RuntimeError(f"retomada não voltou na etapa {etapa}")
+            lat.append(await s.executar(valores_etapa(etapa, a), BOTAO[etapa]))
+            if etapa < 5 and RESPOSTAS[etapa + 1][0].chave not in s.ids: raise RuntimeError(f"fluxo parou na etapa {etapa}: {s.alertas}")
+        if not s.download_ativo: raise RuntimeError("consentimento não foi registrado")
+        return "potencialmente_elegivel" if any(ELEGIVEL in t for t in s.alertas) else "excluido"
+    finally:
+        s.fechar()
+
+async def nivel(portas: List[int], pids: List[int], args) -> Dict[str, Any]:
+    usuarios = args.concorrencia * len(portas)
+    rnd = random.Random(args.seed)
+    intakes = [[gerar_intake(rnd, u * args.intakes + i) for i in range(args.intakes)] for u in range(usuarios)]
+    lat: List[float] = []
+    caminhos: Counter = Counter()
+    erros: List[str] = []
+
+    async def usuario(u: int):
+        for i, a in enumerate(intakes[u]):
+            try:
+                mostrado = await intake(portas, u + i, a, args.troca, lat)
+                caminhos["ok" if mostrado == esperado(a) else "divergente"] += 1
+            except Exception as e:
+                erros.append(f"{type(e).__name__}: {e}")
+    t0 = time.perf_counter()
+    await asyncio.gather(*(usuario(u) for u in range(usuarios)))
+    t = time.perf_counter() - t0
+    concluidos = caminhos["ok"] + caminhos["divergente"]
+    return {"replicas": len(portas), "sessoes": usuarios, "intakes_s": concluidos / t, "concluidos": concluidos,
+            "divergentes": caminhos["divergente"], "erros": erros, "p50_ms": percentil(lat, 50) * 1e3,
+            "p95_ms": percentil(lat, 95) * 1e3, "rss_mb": sum(rss_mb(p) for p in pids)}
+
+def rodar(n: int, tmp: str, args) -> Dict[str, Any]:
+    stub = stub_agendamento()
+    env = {"VIALEVE_DB": os.path.join(tmp, "submissoes.db"), "VIALEVE_SESSION_BACKEND": f"sqlite:{os.path.join(tmp, 'sessoes.db')}",
+           "VIALEVE_SCHED_URL": f"http://127.0.0.1:{stub.server_port}/agendar"}
+    portas = [porta_livre() for _ in range(n)]
+    logs = [open(os.path.join(tmp, f"streamlit{n}-{i}.log"), "w") for i in range(n)]
+    srvs = []
+    try:
+        for p, log in zip(portas, logs): srvs.append(iniciar_servidor(args.app, p, env, log))
+        return asyncio.run(nivel(portas, [s.pid for s in srvs], args))
+    finally:
+        for s in srvs: s.terminate()
+        for s in srvs: s.wait(10)
+        for log in logs: log.close()
+        stub.shutdown()
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--app", default="app.py")
+    ap.add_argument("--replicas", type=lambda s: [int(x) for x in s.split(",")], default=[1, 2, 4])
+    ap.add_argument("--concorrencia", type=int, default=8, help="sessões simultâneas por réplica")
+    ap.add_argument("--intakes", type=int, default=3, help="fluxos completos por sessão")
+    ap.add_argument("--troca", type=int, default=2, help="etapa depois da qual o fluxo muda de réplica")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    print(f"{os.cpu_count()} núcleos; {args.concorrencia} sessões por réplica; troca de réplica depois da etapa {args.troca}")
+    print(f"{'réplicas':>8} {'sessões':>8} {'intakes/s':>10} {'escala':>7} {'p50 ms':>8} {'p95 ms':>8} {'RSS MB':>8}  retomadas")
+    base = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.replicas:
+            r = rodar(n, tmp, args)
+            base = base or r["intakes_s"]
+            print(f"{n:>8} {r['sessoes']:>8} {r['intakes_s']:>10.2f} {r['intakes_s'] / base:>6.2f}x {r['p50_ms']:>8.0f} {r['p95_ms']:>8.0f} "
+                  f"{r['rss_mb']:>8.0f}  {r['concluidos']} ok, {r['divergentes']} divergentes, {len(r['erros'])} erros")
+            for e, c in Counter(r["erros"]).most_common(3): print(f"           {c}x {e}")
+        con = sqlite3.connect(os.path.join(tmp, "sessoes.db"))
+        linhas, tamanho = con.execute("SELECT COUNT(*), AVG(LENGTH(estado)) FROM sessoes").fetchone()
+        con.close()
+    print(f"estado salvo: {linhas} sessões, {tamanho:.0f} bytes de JSON em média por sessão")
+
+if __name__ == "__main__":
+    main()
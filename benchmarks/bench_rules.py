@@ -0,0 +1,50 @@
+import argparse
+import time
+
+from rules import REGRAS, RuleEngine
+from benchmarks.dados import gerar_respostas
+from benchmarks.legado import evaluate_rules_legado
+
+# Uso: python -m benchmarks.bench_rules --n 50000
+
+def medir(rows, f, rep: int) -> float:
+    melhor = float("inf")
+    for _ in range(rep):
+        copias = [dict(r) for r in rows]  # as regras gravam idade no próprio dict
+        t0 = time.perf_counter()
+        for a in copias: f(a)
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--n", type=int, default=50_000)
+    p.add_argument("--rep", type=int, default=3)
+    args = p.parse_args()
+
+    rows = gerar_respostas(args.n, p_sim=0.05)
+    com_tempo, sem_tempo = RuleEngine(REGRAS, medir_tempo=True), RuleEngine(REGRAS)
+    for a in rows:
+        assert com_tempo.evaluate(dict(a)) == evaluate_rules_legado(dict(a))
+        assert com_tempo.evaluate(dict(a), short_circuit=True)[0] == evaluate_rules_legado(dict(a))[0]
+    com_tempo.reset_stats()
+
+    casos = [
+        ("evaluate_rules original", evaluate_rules_legado),
+        ("RuleEngine (contadores+tempo)", com_tempo.evaluate),
+        ("RuleEngine (só contadores)", sem_tempo.evaluate),
+        ("RuleEngine curto-circuito", lambda a: sem_tempo.evaluate(a, True)),
+    ]
+    base = None
+    print(f"respostas: {args.n}  (melhor de {args.rep})")
+    for nome, f in casos:
+        t = medir(rows, f, args.rep)
+        base = base or t
+        print(f"  {nome:32s} {t / args.n * 1e6:7.2f} µs/resposta  x{base / t:.2f}")
+
+    print("\nregras (RuleEngine com tempo):")
+    for s in sorted(com_tempo.stats(), key=lambda s: -s["disparos"]):
+        print(f"  {s['campo']:22s} checadas {s['checadas']:8d}  disparos {s['disparos']:7d}  {s['tempo_ms']:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import gc
+import sys
+import tracemalloc
+
+from answers import Answers
+from sessions import IdleSessions
+from benchmarks.dados import gerar_respostas
+
+# Uso: python -m benchmarks.bench_sessoes --sessoes 10000
+# Bytes por sessão das respostas: dict livre (antes) x Answers (slots/enums, idade calculada), e o que sobra
+# depois que a varredura de sessões ociosas apaga as respostas.
+
+CONSENTIMENTO = {"aceite_termo": True, "autoriza_teleconsulta": True, "lgpd": True, "veracidade": True}
+
+def medir(construir) -> tuple:
+    gc.collect()
+    base = tracemalloc.get_traced_memory()[0]
+    objs = construir()
+    gc.collect()
+    return objs, tracemalloc.get_traced_memory()[0] - base
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--sessoes", type=int, default=10_000)
+    args = p.parse_args()
+    n = args.sessoes
+
+    def dicts():
+        # Como o app guardava: respostas da tela + consentimento + idade/idade_calculada copiadas no dict
+        out = []
+        for r in gerar_respostas(n):
+            r.update(CONSENTIMENTO); r["idade"] = r["idade_calculada"] = 40
+            out.append(r)
+        return out
+
+    def registros():
+        return [Answers.from_dict({**r, **CONSENTIMENTO}) for r in gerar_respostas(n)]
+
+    tracemalloc.start()
+    antes, b_antes = medir(dicts)
+    depois, b_depois = medir(registros)
+    assert all(a.to_dict() == {**r, "idade": a.idade, "idade_calculada": a.idade} for a, r in zip(depois, antes))
+
+    sessoes = IdleSessions(ttl=60)
+    for a in depois: sessoes.touch(a)
+    gc.collect()
+    ocupado = tracemalloc.get_traced_memory()[0]
+    expiradas = sessoes.sweep(float("inf"))
+    gc.collect()
+    liberado = ocupado - tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"{n} sessões (tracemalloc, inclui strings e listas de cada sessão):")
+    print(f"  dict (antes)        {b_antes / n:7.0f} bytes/sessão   (só o dict: {sys.getsizeof(antes[0])} bytes)")
+    print(f"  Answers             {b_depois / n:7.0f} bytes/sessão   (só o registro: {sys.getsizeof(depois[0])} bytes)")
+    print(f"  redução             {(1 - b_depois / b_antes) * 100:6.1f}%")
+    print(f"  ociosas expiradas   {expiradas}: {liberado / n:.0f} bytes/sessão liberados, restam {(b_depois - liberado) / n:.0f} (registro vazio)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import List
+
+from store import SCHEMA, SubmissionStore
+from benchmarks.dados import gerar_respostas
+
+# Uso: python -m benchmarks.bench_store --sessoes 200 --por-sessao 50
+# Simula muitas sessões concluindo ao mesmo tempo (uma thread por sessão, como o Streamlit).
+
+def percentil(xs: List[float], p: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100 * (len(xs) - 1))))]
+
+def rodar(sessoes: int, por_sessao: int, enviar) -> List[float]:
+    respostas = gerar_respostas(por_sessao)
+    lat: List[List[float]] = [[] for _ in range(sessoes)]
+    largada = threading.Barrier(sessoes)
+    def sessao(i: int) -> None:
+        largada.wait()
+        for a in respostas:
+            t0 = time.perf_counter()
+            enviar(dict(a, email=f"s{i}-{a['email']}"))
+            lat[i].append(time.perf_counter() - t0)
+    ts = [threading.Thread(target=sessao, args=(i,)) for i in range(sessoes)]
+    for t in ts: t.start()
+    for t in ts: t.join()
+    return [x for l in lat for x in l]
+
+def main() -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--sessoes", type=int, default=200)
+    p.add_argument("--por-sessao", type=int, default=50)
+    p.add_argument("--synchronous", default="NORMAL", choices=["OFF", "NORMAL", "FULL"])
+    args = p.parse_args()
+    total = args.sessoes * args.por_sessao
+
+    with tempfile.TemporaryDirectory() as d:
+        # Com fila + group commit
+        store = SubmissionStore(os.path.join(d, "lote.db"), synchronous=args.synchronous)
+        t0 = time.perf_counter()
+        lat = rodar(args.sessoes, args.por_sessao, lambda a: store.submit(a, "potencialmente_elegivel"))
+        t_envio = time.perf_counter() - t0
+        store.flush()
+        t_total = time.perf_counter() - t0
+        assert store.count() == total
+        store.close()
+        print(f"SubmissionStore (fila + group commit, synchronous={args.synchronous}):")
+        print(f"  {total / t_total:10,.0f} gravações/s  ({total} em {t_total:.2f}s; envio terminou em {t_envio:.2f}s)")
+        print(f"  tempo na thread do script: p50 {percentil(lat, 50) * 1e6:.1f} µs  p99 {percentil(lat, 99) * 1e6:.1f} µs")
+        t0 = time.perf_counter()
+        for i in range(200): store.find_by_email(f"s{i % args.sessoes}-pessoa{i % args.por_sessao}@exemplo.com")
+        print(f"  busca por e-mail (índice): {(time.perf_counter() - t0) / 200 * 1e3:.2f} ms")
+
+        # Referência: um commit por registro, na própria thread da sessão
+        con = sqlite3.connect(os.path.join(d, "direto.db"), check_same_thread=False, timeout=60)
+        con.execute("PRAGMA journal_mode=WAL"); con.execute(f"PRAGMA synchronous={args.synchronous}")
+        con.executescript(SCHEMA)
+        trava = threading.Lock()
+        def direto(a) -> None:
+            with trava, con:
+                con.execute("INSERT INTO submissions (criado_em, email, status, dados) VALUES (datetime('now'), ?, ?, ?)", (a["email"], "potencialmente_elegivel", str(a)))
+        t0 = time.perf_counter()
+        lat = rodar(args.sessoes, args.por_sessao, direto)
+        t_total = time.perf_counter() - t0
+        print("Commit por registro (referência):")
+        print(f"  {total / t_total:10,.0f} gravações/s  ({total} em {t_total:.2f}s)")
+        print(f"  tempo na thread do script: p50 {percentil(lat, 50) * 1e6:.1f} µs  p99 {percentil(lat, 99) * 1e6:.1f} µs")
+        con.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, List
+
+from rules import EXCIPIENTES_COMUNS, SEM_ALERGIA
+
+# -------- Respostas sintéticas para benchmarks --------
+NIVEIS = ["normal", "leve", "moderada", "grave", "desconhecido"]
+FLAGS = ["gravidez", "amamentando", "tratamento_cancer", "pancreatite_previa", "historico_mtc_men2", "alergia_glp1",
+         "gi_grave", "gastroparesia", "colecistite_12m", "transtorno_alimentar", "uso_corticoide", "antipsicoticos"]
+
+def gerar_resposta(rnd: random.Random, i: int = 0, p_sim: float = 0.03) -> Dict[str, Any]:
+    nasc = date(1950, 1, 1) + timedelta(days=rnd.randrange(0, 365 * 62))
+    a: Dict[str, Any] = {
+        "nome": f"Pessoa {i}", "email": f"pessoa{i}@exemplo.com", "identidade": rnd.choice(["Feminino", "Masculino", "Prefiro não informar"]),
+        "data_nascimento": nasc.isoformat(),
+        "peso": rnd.randint(50, 160), "altura": round(rnd.uniform(1.45, 2.00), 2),
+        "tem_comorbidades": rnd.choice(["sim", "nao"]), "comorbidades": "",
+        "insuf_renal": rnd.choices(NIVEIS, [80, 10, 4, 2, 4])[0], "insuf_hepatica": rnd.choices(NIVEIS, [80, 10, 4, 2, 4])[0],
+        "alergias_componentes": rnd.choice([[], [SEM_ALERGIA], [SEM_ALERGIA], [rnd.choice(EXCIPIENTES_COMUNS[:-1])]]),
+        "outros_componentes": "", "outras_contra": "",
+        "usou_antes": rnd.choice(["sim", "nao"]), "quais": [], "efeitos": "", "objetivo": "Perda de peso", "pronto_mudar": rnd.randint(0, 10),
+    }
+    for k in FLAGS: a[k] = "sim" if rnd.random() < p_sim else "nao"
+    return a
+
+def gerar_respostas(n: int, seed: int = 42, p_sim: float = 0.03) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    return [gerar_resposta(rnd, i, p_sim) for i in range(n)]
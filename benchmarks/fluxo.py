@@ -0,0 +1,101 @@
+import os
+import time
+from datetime import date
+from typing import Any, Dict, List
+
+from streamlit import config, logger
+from streamlit.testing.v1 import AppTest
+
+# benchmarks não precisam dos avisos do Streamlit a cada execução
+config.set_option("logger.level", "critical"); logger.set_log_level("critical")
+
+# -------- Preenche o fluxo de 6 etapas do app.py pelo AppTest --------
+ROTULO_ORGAO = {"normal": "Normal", "leve": "Leve", "moderada": "Moderada", "grave": "Grave", "desconhecido": "Não sei informar"}
+SIM_NAO = {"sim": "Sim", "nao": "Não"}
+
+# campo -> (etapa, tipo de widget, rótulo)
+WIDGETS = {
+    "nome": (0, "text_input", "Nome completo *"),
+    "email": (0, "text_input", "E-mail *"),
+    "identidade": (0, "selectbox", "Como você se identifica? (opcional)"),
+    "peso": (1, "number_input", "Peso (kg) *"),
+    "altura": (1, "number_input", "Altura (m) *"),
+    "tem_comorbidades": (1, "selectbox", "Você tem alguma dessas condições de saúde? (ex.: diabetes tipo 2, pressão alta, apneia do sono, colesterol alto)"),
+    "gravidez": (2, "selectbox", "Está grávida?"),
+    "amamentando": (2, "selectbox", "Está amamentando?"),
+    "tratamento_cancer": (2, "selectbox", "Está em tratamento oncológico ativo?"),
+    "gi_grave": (2, "selectbox", "Doença gastrointestinal grave ativa?"),
+    "gastroparesia": (2, "selectbox", "Diagnóstico de gastroparesia (esvaziamento gástrico lento)?"),
+    "pancreatite_previa": (2, "selectbox", "Já teve pancreatite?"),
+    "historico_mtc_men2": (2, "selectbox", "História pessoal/familiar de carcinoma medular de tireoide (MTC) ou MEN2?"),
+    "colecistite_12m": (2, "selectbox", "Cólica de vesícula/colecistite nos últimos 12 meses?"),
+    "insuf_renal": (3, "selectbox", "Como estão seus rins?"),
+    "insuf_hepatica": (3, "selectbox", "E o fígado?"),
+    "transtorno_alimentar": (3, "selectbox", "Tem transtorno alimentar ativo? (anorexia, bulimia, compulsão alimentar)"),
+    "uso_corticoide": (3, "selectbox", "Usa corticoide todos os dias há mais de 3 meses?"),
+    "antipsicoticos": (3, "selectbox", "Usa medicamentos antipsicóticos atualmente?"),
+    "alergias_componentes": (3, "multiselect", "É alérgico(a) a algum destes componentes comuns?"),
+    "alergia_glp1": (3, "selectbox", "Alergia conhecida a medicamentos do tipo GLP-1?"),
+    "usou_antes": (4, "selectbox", "Já usou medicação para emagrecer?"),
+    "pronto_mudar": (4, "slider", "Quão pronto(a) está para mudanças no dia a dia (0–10)?"),
+}
+CONSENTIMENTO = ["Li e **aceito** o Termo de Consentimento.", "**Autorizo** a consulta on-line (telemedicina).",
+                 "Autorizo o uso dos meus dados (LGPD).", "Confirmo que as informações são verdadeiras."]
+ESTADO = ["step", "answers", "eligibility", "exclusion_reasons", "consent_ok", "versao_enviada", "answers_version", "script_runs"]
+
+def _widget(at: AppTest, tipo: str, rotulo: str):
+    return next(w for w in getattr(at, tipo) if w.label == rotulo)
+
+def _valor_tela(campo: str, v: Any) -> Any:
+    if campo in ("insuf_renal", "insuf_hepatica"): return ROTULO_ORGAO[v]
+    if isinstance(v, str) and v in SIM_NAO and campo != "nome": return SIM_NAO[v]
+    return v
+
+def preencher(at: AppTest, etapa: int, respostas: Dict[str, Any]) -> None:
+    for campo, (e, tipo, rotulo) in WIDGETS.items():
+        if e == etapa and campo in respostas:
+            _widget(at, tipo, rotulo).set_value(_valor_tela(campo, respostas[campo]))
+    if etapa == 0 and respostas.get("data_nascimento"):
+        d = date.fromisoformat(respostas["data_nascimento"])
+        _widget(at, "selectbox", "Dia ").set_value(d.day)
+        _widget(at, "selectbox", "Mês ").set_value(d.month)
+        _widget(at, "selectbox", "Ano ").set_value(d.year)
+
+def clicar(at: AppTest, prefixo: str) -> AppTest:
+    etapa = at.session_state.step
+    next(b for b in at.button if b.label.startswith(prefixo)).click().run()
+    mudou = at.session_state.step != etapa
+    return reabrir(at) if mudou and os.environ.get("VIALEVE_NAV") == "rerun" else at
+
+def continuar(at: AppTest) -> AppTest:
+    return clicar(at, "Continuar")
+
+def reabrir(at: AppTest) -> AppTest:
+    # Com st.rerun o AppTest guarda elementos da execução interrompida; uma nova instância com o
+    # mesmo estado de sessão equivale ao que o navegador passa a mostrar. Essa execução extra
+    # não existe no navegador, por isso não entra em script_runs.
+    novo = AppTest.from_file(at._script_path, default_timeout=at.default_timeout)
+    for k in ESTADO:
+        if k in at.session_state: novo.session_state[k] = at.session_state[k]
+    if "script_runs" in at.session_state: novo.session_state.script_runs -= 1
+    return novo.run()
+
+def completar_fluxo(respostas: Dict[str, Any], app: str = "app.py", consentir: bool = True) -> Dict[str, Any]:
+    # Preenche as etapas 0–4 e o consentimento; devolve o estado final e o tempo de cada transição
+    tempos: List[float] = []
+    t0 = time.perf_counter()
+    at = AppTest.from_file(app, default_timeout=30).run()
+    tempos.append(time.perf_counter() - t0)
+    for etapa in range(5):
+        preencher(at, etapa, respostas)
+        t0 = time.perf_counter()
+        at = continuar(at)
+        tempos.append(time.perf_counter() - t0)
+        assert at.session_state.step == etapa + 1, f"fluxo parou na etapa {etapa}: {[e.value for e in at.error]}"
+    if consentir:
+        for rotulo in CONSENTIMENTO: _widget(at, "checkbox", rotulo).check()
+        t0 = time.perf_counter()
+        at = clicar(at, "Confirmar")
+        tempos.append(time.perf_counter() - t0)
+    return {"at": at, "tempos": tempos, "eligibility": at.session_state.eligibility,
+            "reasons": at.session_state.exclusion_reasons, "consent_ok": at.session_state.consent_ok}
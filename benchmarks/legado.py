@@ -0,0 +1,128 @@
+from typing import Dict, Any
+from datetime import date
+
+from rules import calc_idade, SEM_ALERGIA, EXCIPIENTES_COMUNS
+
+# Versão original (cadeia de ifs) de evaluate_rules, mantida como referência para conferência e benchmarks
+def evaluate_rules_legado(a: Dict[str, Any]):
+    exclusion = []
+    g = lambda k, d=None: a.get(k, d)
+
+    if g("data_nascimento"):
+        try:
+            dob = g("data_nascimento")
+            if isinstance(dob, str): dob = date.fromisoformat(dob)
+            idade = calc_idade(dob)
+            if idade is not None: a["idade"] = idade; a["idade_calculada"] = idade
+        except Exception: pass
+
+    if g("idade") is not None and g("idade") < 18: exclusion.append("Menor de 18 anos.")
+    if g("gravidez") == "sim": exclusion.append("Gestação em curso.")
+    if g("amamentando") == "sim": exclusion.append("Amamentação em curso.")
+    if g("tratamento_cancer") == "sim": exclusion.append("Tratamento oncológico ativo.")
+    if g("pancreatite_previa") == "sim": exclusion.append("História de pancreatite prévia.")
+    if g("historico_mtc_men2") == "sim": exclusion.append("História pessoal/familiar de carcinoma medular de tireoide (MTC) ou MEN2.")
+    if g("alergia_glp1") == "sim": exclusion.append("Hipersensibilidade conhecida a análogos de GLP-1.")
+    if g("alergias_componentes"):
+        if g("alergias_componentes") != [SEM_ALERGIA]:
+            exclusion.append("Alergia relatada a excipientes comuns de formulações injetáveis (ver detalhes).")
+    if g("gi_grave") == "sim": exclusion.append("Doença gastrointestinal grave ativa.")
+    if g("gastroparesia") == "sim": exclusion.append("Gastroparesia diagnosticada.")
+    if g("colecistite_12m") == "sim": exclusion.append("Colecistite/colelitíase sintomática nos últimos 12 meses.")
+    if g("insuf_renal") in ["moderada", "grave"]: exclusion.append("Insuficiência renal moderada/grave (necessita avaliação médica).")
+    if g("insuf_hepatica") in ["moderada", "grave"]: exclusion.append("Insuficiência hepática moderada/grave (necessita avaliação médica).")
+    if g("transtorno_alimentar") == "sim": exclusion.append("Transtorno alimentar ativo.")
+    if g("uso_corticoide") == "sim": exclusion.append("Uso crônico de corticoide (requer avaliação).")
+    if g("antipsicoticos") == "sim": exclusion.append("Uso de antipsicóticos (requer avaliação).")
+
+    try:
+        imc = float(g("peso")) / (float(g("altura")) ** 2) if g("peso") and g("altura") else None
+    except Exception:
+        imc = None
+    if imc is not None and imc < 27 and g("tem_comorbidades") == "nao":
+        exclusion.append("IMC < 27 sem comorbidades relevantes.")
+
+    return ("excluido" if exclusion else "potencialmente_elegivel"), exclusion
+
+
+# Versão original do desenho das etapas (widgets escritos um a um, listas e índices refeitos a cada execução),
+# mantida para os benchmarks; st pode ser o módulo streamlit ou um substituto
+def desenhar_etapa_legado(st, etapa: int, answers) -> None:
+    if etapa == 0:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.text_input("Nome completo *", value=answers.get("nome", ""), placeholder="Seu nome e sobrenome", key="w_nome")
+            st.text_input("E-mail *", value=answers.get("email", ""), placeholder="voce@exemplo.com", key="w_email")
+        with col2:
+            hoje = date.today()
+            default_iso = answers.get("data_nascimento")
+            if isinstance(default_iso, str) and default_iso:
+                try:
+                    d = date.fromisoformat(default_iso)
+                    dia_default, mes_default, ano_default = d.day, d.month, d.year
+                except Exception:
+                    dia_default, mes_default, ano_default = 1, 1, 1990
+            else:
+                dia_default, mes_default, ano_default = 1, 1, 1990
+            # Texto de instrução com cor padrão (sem classe .muted)
+            st.markdown("**Preencha sua data de nascimento** nos campos abaixo (Dia / Mês / Ano).")
+            c1, c2, c3 = st.columns([1,1,2])
+            c1.selectbox("Dia ", list(range(1,32)), index=dia_default-1, placeholder="Selecione o dia", key="w_dia")
+            c2.selectbox("Mês ", list(range(1,13)), index=mes_default-1, placeholder="Selecione o mês", key="w_mes")
+            anos = list(range(1950, hoje.year+1))  # inicia em 1950
+            try:
+                idx = anos.index(ano_default)
+            except ValueError:
+                idx = len(anos)//2
+            c3.selectbox("Ano ", anos, index=idx, placeholder="Selecione o ano", key="w_ano")
+            st.selectbox("Como você se identifica? (opcional)", ["Feminino","Masculino","Prefiro não informar"], index=(["Feminino","Masculino","Prefiro não informar"].index(answers.get("identidade","Feminino")) if answers.get("identidade") else 0), placeholder="Selecione uma opção", key="w_identidade")
+    elif etapa == 1:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.number_input("Peso (kg) *", min_value=30, max_value=400, step=1, value=int(answers.get("peso", 90)), format="%d", key="w_peso")
+            st.selectbox("Você tem alguma dessas condições de saúde? (ex.: diabetes tipo 2, pressão alta, apneia do sono, colesterol alto)", ["Sim","Não"], index=0 if answers.get("tem_comorbidades","sim")=="sim" else 1, placeholder="Selecione uma opção", key="w_tem_comorbidades")
+        with col2:
+            st.number_input("Altura (m) *", min_value=1.30, max_value=2.20, step=0.01, value=float(answers.get("altura", 1.70)), help="Ex.: 1.70", key="w_altura")
+            st.text_area("Se sim, quais comorbidades? (opcional)", value=answers.get("comorbidades", ""), key="w_comorbidades")
+    elif etapa == 2:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.selectbox("Está grávida?", ["Não","Sim"], index=0 if answers.get("gravidez","nao")=="nao" else 1, placeholder="Selecione uma opção", key="w_gravidez")
+            st.selectbox("Está amamentando?", ["Não","Sim"], index=0 if answers.get("amamentando","nao")=="nao" else 1, placeholder="Selecione uma opção", key="w_amamentando")
+            st.selectbox("Está em tratamento oncológico ativo?", ["Não","Sim"], index=0 if answers.get("tratamento_cancer","nao")=="nao" else 1, placeholder="Selecione uma opção", key="w_tratamento_cancer")
+            st.selectbox("Doença gastrointestinal grave ativa?", ["Não","Sim"], index=0 if answers.get("gi_grave","nao")=="nao" else 1, placeholder="Selecione uma opção", key="w_gi_grave")
+            st.selectbox("Diagnóstico de gastroparesia (esvaziamento gástrico lento)?", ["Não","Sim"], index=0 if answers.get("gastroparesia","nao")=="nao" else 1, placeholder="Selecione uma opção", key="w_gastroparesia")
+        with col2:
+            st.selectbox("Já teve pancreatite?", ["Não","Sim"], index=0 if answers.get("pancreatite_previa","nao")=="nao" else 1, placeholder="Selecione uma opção", key="w_pancreatite_previa")
+            st.selectbox("História pessoal/familiar de carcinoma medular de tireoide (MTC) ou MEN2?", ["Não","Sim"], index=0 if answers.get("historico_mtc_men2","nao")=="nao" else 1, placeholder="Selecione uma opção", key="w_historico_mtc_men2")
+            st.selectbox("Cólica de vesícula/colecistite nos últimos 12 meses?", ["Não","Sim"], index=0 if answers.get("colecistite_12m","nao")=="nao" else 1, placeholder="Selecione uma opção", key="w_colecistite_12m")
+            st.text_area("Outras condições clínicas relevantes? (opcional)", value=answers.get("outras_contra",""), key="w_outras_contra")
+    elif etapa == 3:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.selectbox("Como estão seus rins?", ["Normal","Leve","Moderada","Grave","Não sei informar"], index=(["Normal","Leve","Moderada","Grave","Não sei informar"].index(answers.get("insuf_renal","Normal").capitalize()) if answers.get("insuf_renal") else 0), placeholder="Selecione uma opção", key="w_insuf_renal")
+            st.selectbox("E o fígado?", ["Normal","Leve","Moderada","Grave","Não sei informar"], index=(["Normal","Leve","Moderada","Grave","Não sei informar"].index(answers.get("insuf_hepatica","Normal").capitalize()) if answers.get("insuf_hepatica") else 0), placeholder="Selecione uma opção", key="w_insuf_hepatica")
+            st.selectbox("Tem transtorno alimentar ativo? (anorexia, bulimia, compulsão alimentar)", ["Não","Sim"], index=0 if answers.get("transtorno_alimentar","nao")=="nao" else 1, placeholder="Selecione uma opção", key="w_transtorno_alimentar")
+            st.selectbox("Usa corticoide todos os dias há mais de 3 meses?", ["Não","Sim"], index=0 if answers.get("uso_corticoide","nao")=="nao" else 1, placeholder="Selecione uma opção", key="w_uso_corticoide")
+            st.selectbox("Usa medicamentos antipsicóticos atualmente?", ["Não","Sim"], index=0 if answers.get("antipsicoticos","nao")=="nao" else 1, placeholder="Selecione uma opção", key="w_antipsicoticos")
+        with col2:
+            st.multiselect("É alérgico(a) a algum destes componentes comuns?", options=EXCIPIENTES_COMUNS, default=answers.get("alergias_componentes", []), placeholder="Selecione os componentes (pode marcar mais de um)", key="w_alergias_componentes")
+            st.text_input("Alguma outra alergia importante? (opcional)", value=answers.get("outros_componentes",""), key="w_outros_componentes")
+            st.selectbox("Alergia conhecida a medicamentos do tipo GLP-1?", ["Não","Sim"], index=0 if answers.get("alergia_glp1","nao")=="nao" else 1, placeholder="Selecione uma opção", key="w_alergia_glp1")
+    elif etapa == 4:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.selectbox("Já usou medicação para emagrecer?", ["Não","Sim"], index=0 if answers.get("usou_antes","nao")=="nao" else 1, placeholder="Selecione uma opção", key="w_usou_antes")
+            st.multiselect("Quais? (opcional)", options=["Semaglutida","Tirzepatida","Liraglutida","Orlistate","Bupropiona/Naltrexona","Outros"], default=answers.get("quais", []), placeholder="Selecione as medicações", key="w_quais")
+            st.text_area("Teve algum efeito colateral? (opcional)", value=answers.get("efeitos",""), key="w_efeitos")
+        with col2:
+            st.selectbox("Qual seu objetivo principal?", ["Perda de peso","Controle de comorbidades","Manutenção do peso"], index=(["Perda de peso","Controle de comorbidades","Manutenção do peso"].index(answers.get("objetivo","Perda de peso")) if answers.get("objetivo") else 0), placeholder="Selecione uma opção", key="w_objetivo")
+            st.slider("Quão pronto(a) está para mudanças no dia a dia (0–10)?", 0, 10, value=answers.get("pronto_mudar", 6), key="w_pronto_mudar")
+    elif etapa == 5:
+        c1, c2 = st.columns(2)
+        with c1:
+            st.checkbox("Li e **aceito** o Termo de Consentimento.", value=answers.get("aceite_termo", False), key="w_aceite_termo")
+            st.checkbox("**Autorizo** a consulta on-line (telemedicina).", value=answers.get("autoriza_teleconsulta", False), key="w_autoriza_teleconsulta")
+        with c2:
+            st.checkbox("Autorizo o uso dos meus dados (LGPD).", value=answers.get("lgpd", False), key="w_lgpd")
+            st.checkbox("Confirmo que as informações são verdadeiras.", value=answers.get("veracidade", False), key="w_veracidade")
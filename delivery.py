@@ -0,0 +1,187 @@
+import atexit
+import http.client
+import itertools
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+from urllib.parse import urlsplit
+
+from metrics import METRICS
+
+# -------- Entrega das pré-triagens ao agendamento/CRM --------
+# O script do Streamlit só coloca o registro numa fila limitada (put_nowait; nunca espera rede nem disco). Threads de envio
+# juntam o que estiver na fila em lotes e fazem POST (lista JSON) por conexões HTTP keep-alive, uma por thread.
+# Falha de rede, 5xx, 408 e 429: novas tentativas com backoff exponencial (com jitter); esgotadas, o lote vai para o
+# arquivo de transbordo (JSON lines), que também recebe o que não coube na fila (gravado por uma thread própria: a
+# escrita em disco solta o GIL e a thread do script esperaria na fila do GIL). Com a fila vazia, o arquivo é reenviado. Outros 4xx são rejeição do destino: o registro é descartado e contado. Cada registro leva um id
+# para o destino ignorar repetições: a entrega é "pelo menos uma vez". Como no store, o registro é serializado em
+# submit(); as threads de envio só juntam bytes (sem segurar o GIL por um lote inteiro de json.dumps).
+
+# id = prefixo aleatório do processo + sequência: uuid4 por registro chama os.urandom, que também solta o GIL
+_PREFIXO = uuid.uuid4().hex
+_SEQUENCIA = itertools.count()
+
+def _agora() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+class DeliveryQueue:
+    def __init__(self, url: str, spill_path: str, maxsize: int = 1000, lote_max: int = 50, conexoes: int = 2,
+                 tentativas: int = 5, backoff: float = 0.5, backoff_max: float = 30.0, timeout: float = 10.0):
+        u = urlsplit(url)
+        self._conexao = http.client.HTTPSConnection if u.scheme == "https" else http.client.HTTPConnection
+        self._host, self._caminho = u.netloc, (u.path or "/") + (f"?{u.query}" if u.query else "")
+        self.spill_path = spill_path
+        self.lote_max, self.tentativas, self.backoff, self.backoff_max, self.timeout = lote_max, tentativas, backoff, backoff_max, timeout
+        self._fila: "queue.Queue[bytes]" = queue.Queue(maxsize)
+        self._spill_lock = threading.Lock()
+        self._excedente: "queue.SimpleQueue[bytes | None]" = queue.SimpleQueue()  # fila cheia -> thread de transbordo
+        self._cond = threading.Condition()
+        self._contagem = dict.fromkeys(("recebidos", "anteriores", "entregues", "rejeitados", "derramados", "retomados", "retentativas", "requisicoes"), 0)
+        self._retomar_apos = 0.0  # depois de uma falha, o transbordo só é relido após o backoff
+        self._erro: BaseException | None = None
+        self._parar = threading.Event()
+        if os.path.exists(self.spill_path):  # sobra de um processo anterior, ainda no disco
+            with open(self.spill_path, "rb") as f: n = sum(1 for l in f if l.strip())
+            self._contagem["anteriores"] = self._contagem["derramados"] = n
+        self._threads = [threading.Thread(target=self._enviar, name=f"vialeve-delivery-{i}", daemon=True) for i in range(conexoes)]
+        self._thread_disco = threading.Thread(target=self._gravar_excedente, name="vialeve-delivery-spill", daemon=True)
+        for t in self._threads + [self._thread_disco]: t.start()
+        atexit.register(self.close)
+
+    # ---- entrada (thread do script) ----
+    def submit(self, answers: Dict[str, Any], status: str | None = None, reasons: List[str] | None = None,
+               id: str | None = None) -> bool:
+        # Não bloqueia: False quando a fila está cheia e o registro vai para o disco. id estável (o app usa sessão +
+        # versão das respostas) deixa o destino descartar um reenvio do mesmo intake; sem id, um novo por registro
+        registro = json.dumps({"id": id or f"{_PREFIXO}-{next(_SEQUENCIA)}", "criado_em": _agora(), "answers": answers, "status": status,
+                               "reasons": reasons or []}, ensure_ascii=False, default=str).encode()
+        self._contar(recebidos=1)
+        try:
+            self._fila.put_nowait(registro); return True
+        except queue.Full:
+            self._excedente.put(registro); return False
+
+    # ---- envio ----
+    def _enviar(self) -> None:
+        con = None
+        while True:
+            try:
+                lote = [self._fila.get(timeout=0.2)]
+            except queue.Empty:
+                if self._parar.is_set(): break
+                lote = self._retomar()
+                if not lote: continue
+            while len(lote) < self.lote_max:
+                try: lote.append(self._fila.get_nowait())
+                except queue.Empty: break
+            for i in range(0, len(lote), self.lote_max):
+                con = self._entregar(con, lote[i:i + self.lote_max])
+        if con: con.close()
+
+    def _entregar(self, con, lote: List[bytes]):
+        corpo = b"[" + b",".join(lote) + b"]"
+        for tentativa in range(self.tentativas):
+            status = None
+            try:
+                if con is None: con = self._conexao(self._host, timeout=self.timeout)
+                con.request("POST", self._caminho, body=corpo, headers={"Content-Type": "application/json"})
+                r = con.getresponse(); r.read()
+                status = r.status
+                if r.will_close: con.close(); con = None
+            except (OSError, http.client.HTTPException) as e:
+                self._erro = e
+                if con: con.close()
+                con = None
+            self._contar(requisicoes=1)
+            if status is not None and status < 300:
+                self._contar(entregues=len(lote)); METRICS.inc("vialeve_delivery_total", len(lote), resultado="entregue")
+                return con
+            if status is not None and 400 <= status < 500 and status not in (408, 429):
+                self._erro = RuntimeError(f"HTTP {status} do destino")
+                self._contar(rejeitados=len(lote)); METRICS.inc("vialeve_delivery_total", len(lote), resultado="rejeitado")
+                return con
+            if status is not None: self._erro = RuntimeError(f"HTTP {status} do destino")
+            self._contar(retentativas=1); METRICS.inc("vialeve_delivery_retries_total")
+            espera = min(self.backoff_max, self.backoff * 2 ** tentativa) * random.uniform(0.5, 1.0)
+            if tentativa + 1 < self.tentativas and self._parar.wait(espera): break
+        self._retomar_apos = time.monotonic() + self.backoff_max
+        self._derramar(lote)
+        return con
+
+    # ---- transbordo em disco ----
+    def _gravar_excedente(self) -> None:
+        fim = False
+        while not fim:
+            lote = [self._excedente.get()]
+            while True:
+                try: lote.append(self._excedente.get_nowait())
+                except queue.Empty: break
+            if None in lote:
+                fim = True; lote = [r for r in lote if r is not None]
+            if lote: self._derramar(lote)
+
+    def _derramar(self, registros: List[bytes]) -> None:
+        # Um registro JSON por linha (json.dumps não gera quebras de linha)
+        with self._spill_lock:
+            with open(self.spill_path, "ab") as f: f.write(b"".join(r + b"\n" for r in registros))
+        self._contar(derramados=len(registros)); METRICS.inc("vialeve_delivery_total", len(registros), resultado="derramado")
+
+    def _retomar(self) -> List[bytes]:
+        # Fila vazia: o que está no disco volta a ser enviado (uma thread por vez; o arquivo é consumido inteiro)
+        if time.monotonic() < self._retomar_apos or self._parar.is_set(): return []
+        with self._spill_lock:
+            try:
+                with open(self.spill_path, "rb") as f: registros = [l.rstrip(b"\n") for l in f if l.strip()]
+                os.remove(self.spill_path)
+            except FileNotFoundError:
+                return []
+        self._contar(retomados=len(registros))
+        return registros
+
+    # ---- controle ----
+    def _contar(self, **n: int) -> None:
+        with self._cond:
+            for k, v in n.items(): self._contagem[k] += v
+            self._cond.notify_all()
+
+    def flush(self, timeout: float | None = None, disco: bool = False) -> bool:
+        # Espera até que tudo o que foi recebido até agora (e o que um processo anterior deixou no disco) esteja
+        # entregue ou rejeitado; com disco=True, basta estar no arquivo de transbordo
+        c = self._contagem
+        with self._cond:
+            alvo = c["recebidos"] + c["anteriores"]
+            no_disco = lambda: c["derramados"] - c["retomados"] if disco else 0
+            return self._cond.wait_for(lambda: c["entregues"] + c["rejeitados"] + no_disco() >= alvo, timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        # Dá timeout segundos para esvaziar a fila; o que sobrar vai para o disco e é enviado no próximo processo
+        if self._parar.is_set(): return
+        self.flush(timeout, disco=True)
+        self._parar.set()
+        for t in self._threads: t.join(timeout)
+        while True:
+            try: self._excedente.put(self._fila.get_nowait())
+            except queue.Empty: break
+        self._excedente.put(None)
+        self._thread_disco.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond: c = dict(self._contagem)
+        c["na_fila"] = self._fila.qsize()
+        c["no_disco"] = c["derramados"] - c["retomados"]
+        return c
+
+    @property
+    def pending(self) -> int:
+        c = self.stats()
+        return c["recebidos"] + c["anteriores"] - c["entregues"] - c["rejeitados"]
+
+    @property
+    def last_error(self) -> BaseException | None:
+        return self._erro
@@ -0,0 +1,93 @@
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, TextIO
+
+# -------- Exportação das respostas --------
+# answers_to_json: JSON canônico das respostas de uma sessão (botão de download do app).
+# export_*: exportação em massa do SubmissionStore para NDJSON/CSV, em blocos de tamanho fixo (memória constante).
+
+# Campos das respostas, na ordem das etapas do app (colunas do CSV)
+CAMPOS_RESPOSTAS = [
+    "nome", "email", "identidade", "data_nascimento", "idade", "idade_calculada",
+    "peso", "altura", "tem_comorbidades", "comorbidades",
+    "gravidez", "amamentando", "tratamento_cancer", "gi_grave", "gastroparesia", "pancreatite_previa", "historico_mtc_men2", "colecistite_12m", "outras_contra",
+    "insuf_renal", "insuf_hepatica", "transtorno_alimentar", "uso_corticoide", "antipsicoticos", "alergias_componentes", "outros_componentes", "alergia_glp1",
+    "usou_antes", "quais", "efeitos", "objetivo", "pronto_mudar",
+    "aceite_termo", "autoriza_teleconsulta", "lgpd", "veracidade",
+]
+COLUNAS_CSV = ["id", "criado_em", "status", "reasons"] + CAMPOS_RESPOSTAS
+
+def _padrao(v: Any) -> Any:
+    if isinstance(v, (date, datetime)): return v.isoformat()
+    if isinstance(v, (set, frozenset)): return sorted(v, key=str)
+    if isinstance(v, tuple): return list(v)
+    return str(v)
+
+def answers_to_json(answers: Dict[str, Any], indent: int | None = 2) -> str:
+    # Chaves ordenadas e formatação fixa: as mesmas respostas geram sempre o mesmo texto
+    return json.dumps(answers, ensure_ascii=False, sort_keys=True, indent=indent, default=_padrao)
+
+def _celula(v: Any) -> Any:
+    # Listas separadas por ";" (o mesmo formato que batch.py lê), booleanos em minúsculas
+    if isinstance(v, list): return ";".join(map(str, v))
+    if isinstance(v, bool): return "true" if v else "false"
+    return "" if v is None else v
+
+def _cursor(con: sqlite3.Connection, desde: str | None, ate: str | None) -> sqlite3.Cursor:
+    sql, args = "SELECT id, criado_em, dados FROM submissions", []
+    filtros = []
+    if desde: filtros.append("criado_em >= ?"); args.append(desde)
+    if ate: filtros.append("criado_em < ?"); args.append(ate)
+    if filtros: sql += " WHERE " + " AND ".join(filtros)
+    return con.execute(sql + " ORDER BY id", args)
+
+def _blocos(con: sqlite3.Connection, desde: str | None, ate: str | None, bloco: int) -> Iterator[List[tuple]]:
+    cur = _cursor(con, desde, ate)
+    while linhas := cur.fetchmany(bloco): yield linhas
+
+def export_ndjson(con: sqlite3.Connection, out: TextIO, desde: str | None = None, ate: str | None = None, bloco: int = 1_000) -> int:
+    # "dados" já é JSON: cada linha é montada sem decodificar o registro
+    n = 0
+    for linhas in _blocos(con, desde, ate, bloco):
+        out.write("".join(f'{{"id": {i}, "criado_em": {json.dumps(c)}, {d[1:]}\n' for i, c, d in linhas))
+        n += len(linhas)
+    return n
+
+def export_csv(con: sqlite3.Connection, out: TextIO, desde: str | None = None, ate: str | None = None, bloco: int = 1_000) -> int:
+    w = csv.writer(out)
+    w.writerow(COLUNAS_CSV)
+    n = 0
+    for linhas in _blocos(con, desde, ate, bloco):
+        regs = []
+        for i, c, d in linhas:
+            r = json.loads(d)
+            a = r.get("answers", {})
+            regs.append([i, c, r.get("status") or "", ";".join(r.get("reasons") or [])] + [_celula(a.get(k)) for k in CAMPOS_RESPOSTAS])
+        w.writerows(regs)
+        n += len(linhas)
+    return n
+
+def main(argv: List[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Exporta as respostas gravadas (SubmissionStore) para NDJSON ou CSV.")
+    p.add_argument("--db", default="vialeve.db")
+    p.add_argument("--formato", choices=["ndjson", "csv"], default="ndjson")
+    p.add_argument("-o", "--saida", default="-", help="arquivo de saída (padrão: stdout)")
+    p.add_argument("--desde", help="data/hora ISO (UTC), inclusiva")
+    p.add_argument("--ate", help="data/hora ISO (UTC), exclusiva")
+    p.add_argument("--bloco", type=int, default=1_000, help="registros lidos e escritos por vez")
+    args = p.parse_args(argv)
+    con = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    out = sys.stdout if args.saida == "-" else open(args.saida, "w", encoding="utf-8", newline="")
+    try:
+        n = (export_csv if args.formato == "csv" else export_ndjson)(con, out, args.desde, args.ate, args.bloco)
+    finally:
+        con.close()
+        if out is not sys.stdout: out.close()
+    print(f"{n} registros exportados.", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+# -------- Métricas do processo (formato texto do Prometheus) --------
+# Cada thread escreve só no próprio shard (contadores e histogramas em dicts simples), então não há lock no caminho
+# quente; a leitura (/metrics ou o arquivo) soma os shards. O Streamlit usa uma thread por execução do script: shards
+# de threads que já terminaram são incorporados a um acumulado e descartados. Os valores são do processo: com
+# vários processos, cada um expõe os seus.
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+AJUDA = {
+    "vialeve_step_enter_total": ("counter", "Entradas em cada etapa (primeira execução da sessão na etapa)."),
+    "vialeve_step_exit_total": ("counter", "Saídas de cada etapa, por destino."),
+    "vialeve_intakes_completed_total": ("counter", "Pré-triagens com consentimento confirmado e gravadas."),
+    "vialeve_eligibility_total": ("counter", "Avaliações por resultado."),
+    "vialeve_exclusion_reason_total": ("counter", "Motivos de exclusão, pelo campo da regra que disparou."),
+    "vialeve_delivery_total": ("counter", "Pré-triagens entregues ao agendamento/CRM, rejeitadas ou levadas ao transbordo em disco."),
+    "vialeve_delivery_retries_total": ("counter", "Novas tentativas de envio de lotes ao agendamento/CRM."),
+    "vialeve_session_resume_total": ("counter", "Sessões novas, retomadas pelo token da URL ou com token expirado."),
+    "vialeve_step_render_seconds": ("histogram", "Tempo de execução do bloco de cada etapa."),
+    "vialeve_rules_seconds": ("histogram", "Tempo das regras a cada gravação de respostas (avaliação incremental)."),
+}
+
+Chave = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+class _Shard:
+    __slots__ = ("contadores", "histogramas")
+    def __init__(self):
+        self.contadores: Dict[Chave, float] = {}
+        self.histogramas: Dict[Chave, list] = {}  # [contagem por bucket..., +Inf, soma]
+
+class Metrics:
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, _Shard]] = []
+        self._acumulado = _Shard()  # threads encerradas
+        self._lock = threading.Lock()  # só registro de shards e leitura; inc/observe não usam
+
+    def _shard(self) -> _Shard:
+        try: return self._local.shard
+        except AttributeError:
+            s = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append((threading.current_thread(), s))
+                if len(self._shards) > 64: self._recolher()
+            return s
+
+    def _recolher(self) -> None:
+        # Chamado com o lock: threads mortas não escrevem mais, então o shard pode ser somado sem corrida
+        vivos = []
+        for t, s in self._shards:
+            if t.is_alive(): vivos.append((t, s))
+            else: _somar(self._acumulado, s)
+        self._shards = vivos
+
+    def inc(self, nome: str, valor: float = 1, **labels: str) -> None:
+        c = self._shard().contadores
+        k = (nome, tuple(sorted(labels.items())))
+        c[k] = c.get(k, 0) + valor
+
+    def observe(self, nome: str, segundos: float, **labels: str) -> None:
+        h = self._shard().histogramas
+        k = (nome, tuple(sorted(labels.items())))
+        v = h.get(k)
+        if v is None: v = h[k] = [0] * (len(BUCKETS) + 2)
+        v[bisect_left(BUCKETS, segundos)] += 1
+        v[-1] += segundos
+
+    def timer(self, nome: str, **labels: str) -> "_Timer":
+        return _Timer(self, nome, labels)
+
+    def snapshot(self) -> Tuple[Dict[Chave, float], Dict[Chave, list]]:
+        total = _Shard()
+        with self._lock:
+            self._recolher()
+            _somar(total, self._acumulado)
+            for _, s in self._shards: _somar(total, s)
+        return total.contadores, total.histogramas
+
+    def prometheus(self) -> str:
+        contadores, histogramas = self.snapshot()
+        linhas, vistos = [], set()
+        def cabecalho(nome):
+            if nome not in vistos:
+                vistos.add(nome)
+                tipo, ajuda = AJUDA.get(nome, ("untyped", nome))
+                linhas.extend([f"# HELP {nome} {ajuda}", f"# TYPE {nome} {tipo}"])
+        for (nome, labels), v in sorted(contadores.items()):
+            cabecalho(nome); linhas.append(f"{nome}{_labels(labels)} {v:g}")
+        for (nome, labels), v in sorted(histogramas.items()):
+            cabecalho(nome)
+            acumulado = 0
+            for le, n in zip([*map(str, BUCKETS), "+Inf"], v[:-1]):
+                acumulado += n
+                linhas.append(f"{nome}_bucket{_labels(labels + (('le', le),))} {acumulado}")
+            linhas.append(f"{nome}_sum{_labels(labels)} {v[-1]:.6f}")
+            linhas.append(f"{nome}_count{_labels(labels)} {acumulado}")
+        return "\n".join(linhas) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            for s in [self._acumulado] + [s for _, s in self._shards]: s.contadores.clear(); s.histogramas.clear()
+
+def _somar(destino: _Shard, origem: _Shard) -> None:
+    # list(...) antes de iterar: a thread dona do shard pode estar inserindo chaves ao mesmo tempo
+    for k, v in list(origem.contadores.items()): destino.contadores[k] = destino.contadores.get(k, 0) + v
+    for k, v in list(origem.histogramas.items()):
+        t = destino.histogramas.setdefault(k, [0] * len(v))
+        for i, x in enumerate(list(v)): t[i] += x
+
+class _Timer:
+    __slots__ = ("m", "nome", "labels", "t0")
+    def __init__(self, m: Metrics, nome: str, labels: Dict[str, str]):
+        self.m, self.nome, self.labels = m, nome, labels
+    def __enter__(self):
+        self.t0 = time.perf_counter(); return self
+    def __exit__(self, *exc):
+        self.m.observe(self.nome, time.perf_counter() - self.t0, **self.labels)
+
+def _labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels: return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in labels) + "}"
+
+METRICS = Metrics()
+
+# ---- exposição ----
+def serve(porta: int, host: str = "127.0.0.1", m: Metrics = METRICS) -> ThreadingHTTPServer:
+    # GET /metrics em uma thread própria (só para a rede local; o Prometheus raspa daqui)
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404); return
+            corpo = m.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers(); self.wfile.write(corpo)
+        def log_message(self, *args): pass
+    srv = ThreadingHTTPServer((host, porta), Handler)
+    threading.Thread(target=srv.serve_forever, name="vialeve-metrics", daemon=True).start()
+    return srv
+
+def dump_periodically(caminho: str, intervalo: float = 15.0, m: Metrics = METRICS) -> threading.Thread:
+    # Reescreve o arquivo a cada intervalo (troca atômica: quem lê nunca vê o arquivo pela metade)
+    def laco():
+        while True:
+            time.sleep(intervalo)
+            tmp = f"{caminho}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f: f.write(m.prometheus())
+            os.replace(tmp, caminho)
+    t = threading.Thread(target=laco, name="vialeve-metrics-dump", daemon=True)
+    t.start()
+    return t
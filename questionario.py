@@ -0,0 +1,155 @@
+from dataclasses import dataclass, field
+from datetime import date
+from functools import lru_cache, partial
+from typing import Any, Dict, List, Tuple
+
+from answers import codificar
+from rules import EXCIPIENTES_COMUNS, norm_orgao
+
+# -------- Questionário como dados --------
+# Cada pergunta: campo, etapa, coluna (0/1), widget, rótulo, opções, codificação e argumentos extras do widget.
+# Opções, índice do valor gravado -> posição na lista e rótulo -> valor gravado são montados uma vez, na importação;
+# o app só desenha a etapa atual (desenhar_perguntas, recebendo o módulo st) e lê as respostas com ler_etapa.
+# Codificações: "sim_nao" ("Sim"/"Não" -> "sim"/"nao"), "orgao" (rótulos -> vocabulário de norm_orgao) ou None
+# (grava o próprio valor do widget).
+
+SIM_NAO = {"Sim": "sim", "Não": "nao"}
+NIVEIS_ORGAO = ("Normal", "Leve", "Moderada", "Grave", "Não sei informar")
+SELECIONE = {"placeholder": "Selecione uma opção"}
+
+@dataclass(frozen=True, slots=True)
+class Pergunta:
+    campo: str
+    etapa: int
+    coluna: int
+    widget: str
+    rotulo: str
+    opcoes: Tuple[Any, ...] = ()
+    codificacao: str | None = None
+    padrao: Any = None
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    # montados em __post_init__
+    chave: str = ""
+    indice: Dict[Any, int] = field(default_factory=dict)
+    de_rotulo: Dict[Any, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if self.codificacao == "sim_nao": de_rotulo = {o: SIM_NAO[o] for o in self.opcoes}
+        elif self.codificacao == "orgao": de_rotulo = {o: norm_orgao(o) for o in self.opcoes}
+        else: de_rotulo = {}
+        object.__setattr__(self, "chave", f"w_{self.campo}")
+        object.__setattr__(self, "de_rotulo", de_rotulo)
+        object.__setattr__(self, "indice", {de_rotulo.get(o, o): i for i, o in enumerate(self.opcoes)})
+
+    def ler(self, valor: Any) -> Any:
+        # Valor do widget -> valor gravado nas respostas
+        return self.de_rotulo.get(valor, valor) if self.de_rotulo else valor
+
+def _sim_nao(campo: str, etapa: int, coluna: int, rotulo: str, opcoes: Tuple[str, str] = ("Não", "Sim")) -> Pergunta:
+    return Pergunta(campo, etapa, coluna, "selectbox", rotulo, opcoes, "sim_nao", kwargs=SELECIONE)
+
+PERGUNTAS: List[Pergunta] = [
+    # Etapa 0
+    Pergunta("nome", 0, 0, "texto", "Nome completo *", padrao="", kwargs={"placeholder": "Seu nome e sobrenome"}),
+    Pergunta("email", 0, 0, "texto", "E-mail *", padrao="", kwargs={"placeholder": "voce@exemplo.com"}),
+    Pergunta("", 0, 1, "markdown", "**Preencha sua data de nascimento** nos campos abaixo (Dia / Mês / Ano)."),
+    Pergunta("data_nascimento", 0, 1, "data", ""),
+    Pergunta("identidade", 0, 1, "selectbox", "Como você se identifica? (opcional)", ("Feminino", "Masculino", "Prefiro não informar"), kwargs=SELECIONE),
+    # Etapa 1
+    Pergunta("peso", 1, 0, "numero", "Peso (kg) *", padrao=90, kwargs={"min_value": 30, "max_value": 400, "step": 1, "format": "%d"}),
+    _sim_nao("tem_comorbidades", 1, 0, "Você tem alguma dessas condições de saúde? (ex.: diabetes tipo 2, pressão alta, apneia do sono, colesterol alto)", ("Sim", "Não")),
+    Pergunta("altura", 1, 1, "numero", "Altura (m) *", padrao=1.70, kwargs={"min_value": 1.30, "max_value": 2.20, "step": 0.01, "help": "Ex.: 1.70"}),
+    Pergunta("comorbidades", 1, 1, "area", "Se sim, quais comorbidades? (opcional)", padrao=""),
+    # Etapa 2
+    _sim_nao("gravidez", 2, 0, "Está grávida?"),
+    _sim_nao("amamentando", 2, 0, "Está amamentando?"),
+    _sim_nao("tratamento_cancer", 2, 0, "Está em tratamento oncológico ativo?"),
+    _sim_nao("gi_grave", 2, 0, "Doença gastrointestinal grave ativa?"),
+    _sim_nao("gastroparesia", 2, 0, "Diagnóstico de gastroparesia (esvaziamento gástrico lento)?"),
+    _sim_nao("pancreatite_previa", 2, 1, "Já teve pancreatite?"),
+    _sim_nao("historico_mtc_men2", 2, 1, "História pessoal/familiar de carcinoma medular de tireoide (MTC) ou MEN2?"),
+    _sim_nao("colecistite_12m", 2, 1, "Cólica de vesícula/colecistite nos últimos 12 meses?"),
+    Pergunta("outras_contra", 2, 1, "area", "Outras condições clínicas relevantes? (opcional)", padrao=""),
+    # Etapa 3
+    Pergunta("insuf_renal", 3, 0, "selectbox", "Como estão seus rins?", NIVEIS_ORGAO, "orgao", kwargs=SELECIONE),
+    Pergunta("insuf_hepatica", 3, 0, "selectbox", "E o fígado?", NIVEIS_ORGAO, "orgao", kwargs=SELECIONE),
+    _sim_nao("transtorno_alimentar", 3, 0, "Tem transtorno alimentar ativo? (anorexia, bulimia, compulsão alimentar)"),
+    _sim_nao("uso_corticoide", 3, 0, "Usa corticoide todos os dias há mais de 3 meses?"),
+    _sim_nao("antipsicoticos", 3, 0, "Usa medicamentos antipsicóticos atualmente?"),
+    Pergunta("alergias_componentes", 3, 1, "multiselect", "É alérgico(a) a algum destes componentes comuns?", tuple(EXCIPIENTES_COMUNS), padrao=[],
+             kwargs={"placeholder": "Selecione os componentes (pode marcar mais de um)"}),
+    Pergunta("outros_componentes", 3, 1, "texto", "Alguma outra alergia importante? (opcional)", padrao=""),
+    _sim_nao("alergia_glp1", 3, 1, "Alergia conhecida a medicamentos do tipo GLP-1?"),
+    # Etapa 4
+    _sim_nao("usou_antes", 4, 0, "Já usou medicação para emagrecer?"),
+    Pergunta("quais", 4, 0, "multiselect", "Quais? (opcional)", ("Semaglutida", "Tirzepatida", "Liraglutida", "Orlistate", "Bupropiona/Naltrexona", "Outros"), padrao=[],
+             kwargs={"placeholder": "Selecione as medicações"}),
+    Pergunta("efeitos", 4, 0, "area", "Teve algum efeito colateral? (opcional)", padrao=""),
+    Pergunta("objetivo", 4, 1, "selectbox", "Qual seu objetivo principal?", ("Perda de peso", "Controle de comorbidades", "Manutenção do peso"), kwargs=SELECIONE),
+    Pergunta("pronto_mudar", 4, 1, "slider", "Quão pronto(a) está para mudanças no dia a dia (0–10)?", padrao=6, kwargs={"min_value": 0, "max_value": 10}),
+    # Etapa 5 (formulário de consentimento)
+    Pergunta("aceite_termo", 5, 0, "checkbox", "Li e **aceito** o Termo de Consentimento.", padrao=False),
+    Pergunta("autoriza_teleconsulta", 5, 0, "checkbox", "**Autorizo** a consulta on-line (telemedicina).", padrao=False),
+    Pergunta("lgpd", 5, 1, "checkbox", "Autorizo o uso dos meus dados (LGPD).", padrao=False),
+    Pergunta("veracidade", 5, 1, "checkbox", "Confirmo que as informações são verdadeiras.", padrao=False),
+]
+
+# Por etapa: (perguntas da coluna 0, perguntas da coluna 1), na ordem da tela; e as que gravam valor
+COLUNAS = [tuple(tuple(p for p in PERGUNTAS if p.etapa == e and p.coluna == c) for c in (0, 1)) for e in range(6)]
+RESPOSTAS = [tuple(p for p in PERGUNTAS if p.etapa == e and p.campo and p.widget != "data") for e in range(6)]
+
+# Data de nascimento: três selectbox (Dia / Mês / Ano), anos de 1950 até o ano corrente
+DIAS = tuple(range(1, 32))
+MESES = tuple(range(1, 13))
+
+@lru_cache(maxsize=2)
+def anos(ano_atual: int) -> Tuple[Tuple[int, ...], Dict[int, int]]:
+    lista = tuple(range(1950, ano_atual + 1))
+    return lista, {a: i for i, a in enumerate(lista)}
+
+def ler_etapa(etapa: int, estado: Any) -> Dict[str, Any]:
+    # estado: st.session_state (widgets com chave "w_<campo>")
+    return {p.campo: p.ler(estado[p.chave]) for p in RESPOSTAS[etapa]}
+
+# -------- Desenho --------
+# Cada pergunta vira, uma vez, uma chamada de widget já presa ao ui com os argumentos fixos (rótulo, opções, chave,
+# placeholder...) e a conversão do valor gravado; a cada execução o laço só lê o valor em answers.Answers e passa o
+# argumento que muda. ui é o módulo streamlit (os benchmarks passam um substituto que não desenha nada).
+# Índice da opção pela forma gravada em Answers (enums, strings), sem decodificar a cada execução
+INDICE_GRAVADO = {p.campo: {codificar(p.campo, v): n for v, n in p.indice.items()} for p in PERGUNTAS if p.opcoes}
+METODO = {"texto": "text_input", "area": "text_area", "numero": "number_input", "slider": "slider", "checkbox": "checkbox"}
+
+def _data_nascimento(ui, d: date | None) -> None:
+    d = d or date(1990, 1, 1)
+    lista, indice = anos(date.today().year)  # inicia em 1950
+    c1, c2, c3 = ui.columns([1,1,2])
+    c1.selectbox("Dia ", DIAS, index=d.day-1, placeholder="Selecione o dia", key="w_dia")
+    c2.selectbox("Mês ", MESES, index=d.month-1, placeholder="Selecione o mês", key="w_mes")
+    c3.selectbox("Ano ", lista, index=indice.get(d.year, len(lista)//2), placeholder="Selecione o ano", key="w_ano")
+
+def _linha(ui, p: Pergunta) -> tuple:
+    # (chamada, campo, argumento que recebe o valor gravado, conversão, padrão)
+    if p.widget == "markdown": return partial(ui.markdown, p.rotulo), "", None, None, None
+    if p.widget == "data": return partial(_data_nascimento, ui), p.campo, "", None, None
+    fixos = {"key": p.chave, **p.kwargs}
+    if p.widget == "selectbox": return partial(ui.selectbox, p.rotulo, p.opcoes, **fixos), p.campo, "index", INDICE_GRAVADO[p.campo], None
+    if p.widget == "multiselect": return partial(ui.multiselect, p.rotulo, options=p.opcoes, **fixos), p.campo, "default", None, None
+    tipo = type(p.padrao) if p.widget == "numero" else None  # peso int, altura float, como o padrão
+    return partial(getattr(ui, METODO[p.widget]), p.rotulo, **fixos), p.campo, "value", tipo, p.padrao
+
+@lru_cache(maxsize=4)
+def _desenho(ui) -> List[Tuple[Tuple[tuple, ...], ...]]:
+    # Por etapa e coluna, as linhas das perguntas na ordem da tela; montadas uma vez por ui (na prática, o módulo st)
+    return [tuple(tuple(_linha(ui, p) for p in coluna) for coluna in colunas) for colunas in COLUNAS]
+
+def desenhar_perguntas(ui, etapa: int, a) -> None:
+    # Só as perguntas da etapa pedida, nas duas colunas; a: answers.Answers
+    for coluna, linhas in zip(ui.columns(2), _desenho(ui)[etapa]):
+        with coluna:
+            for chamada, campo, arg, conv, padrao in linhas:
+                if not campo: chamada(); continue
+                v = getattr(a, campo)
+                if arg == "value": chamada(value=padrao if v is None else conv(v) if conv else v)
+                elif arg == "index": chamada(index=conv.get(v, 0))
+                elif arg == "default": chamada(default=[] if v is None else list(v))
+                else: chamada(v)  # data de nascimento
@@ -0,0 +1,205 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from collections import Counter
+from multiprocessing import Pool
+from typing import Any, Dict, Iterator, List, Tuple
+
+from batch import _csv_row
+from rules import REGRAS, RuleEngine
+
+# -------- Replay do histórico sob duas versões das regras --------
+# Reavalia respostas gravadas (JSONL ou CSV) com as regras A e B e conta o que muda: status que viraram, motivos que
+# entram e saem (pelo texto da mensagem) e a lista dos registros cujo status mudou. A entrada é dividida em faixas de
+# bytes alinhadas em quebras de linha; cada processo do pool lê a sua faixa direto do arquivo e devolve só os
+# agregados (os registros alterados vão para partes/<faixa>.jsonl). O processo principal anota cada faixa concluída
+# em checkpoint.jsonl; ao rodar de novo com a mesma saída, as faixas anotadas são puladas.
+# CSV: uma resposta por linha (sem quebras de linha dentro de campos).
+# Versões das regras: "atual" (rules.REGRAS), "git:<rev>" (rules.py daquela revisão), arquivo .json (lista de regras,
+# como gera --exportar-regras) ou .py com REGRAS.
+
+def carregar_regras(fonte: str) -> List[tuple]:
+    if fonte == "atual": return list(REGRAS)
+    if fonte.startswith("git:"):
+        codigo = subprocess.run(["git", "show", f"{fonte[4:]}:rules.py"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout
+        ns: Dict[str, Any] = {}
+        exec(compile(codigo, fonte, "exec"), ns)
+        return list(ns["REGRAS"])
+    if fonte.endswith(".json"):
+        with open(fonte, encoding="utf-8") as f: return [_regra_json(r) for r in json.load(f)]
+    ns = {"__name__": "regras"}
+    with open(fonte, encoding="utf-8") as f: exec(compile(f.read(), fonte, "exec"), ns)
+    return list(ns["REGRAS"])
+
+def _regra_json(r: list) -> tuple:
+    # JSON não tem tupla: valores de "in" e condições extras voltam ao formato da tabela
+    valor = lambda op, x: tuple(x) if op == "in" else x
+    regra = (r[0], r[1], valor(r[1], r[2]), r[3])
+    return regra + ([(c, op, valor(op, x)) for c, op, x in r[4]],) if len(r) > 4 else regra
+
+def exportar_regras(caminho: str, regras: List[tuple] = REGRAS) -> None:
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write("[\n" + ",\n".join(json.dumps(r, ensure_ascii=False) for r in regras) + "\n]\n")
+
+def _impressao(regras: List[tuple]) -> str:
+    return hashlib.sha256(json.dumps(regras, ensure_ascii=False).encode()).hexdigest()[:16]
+
+def faixas(caminho: str, bloco: int, inicio: int = 0) -> List[Tuple[int, int]]:
+    # [(início, fim)] em bytes; cada fim cai logo depois de uma quebra de linha
+    tamanho = os.path.getsize(caminho)
+    out = []
+    with open(caminho, "rb") as f:
+        pos = inicio
+        while pos < tamanho:
+            if pos + bloco >= tamanho: fim = tamanho
+            else:
+                f.seek(pos + bloco); f.readline(); fim = f.tell()
+            out.append((pos, fim)); pos = fim
+    return out
+
+# ---- trabalho de cada processo ----
+_ESTADO: Dict[str, Any] = {}
+
+def _iniciar(regras_a: List[tuple], regras_b: List[tuple], opcoes: Dict[str, Any]) -> None:
+    _ESTADO.update(opcoes, a=RuleEngine(regras_a, medir_tempo=False), b=RuleEngine(regras_b, medir_tempo=False))
+
+def _linhas(caminho: str, inicio: int, fim: int) -> Iterator[Tuple[int, bytes]]:
+    with open(caminho, "rb") as f:
+        f.seek(inicio)
+        pos = inicio
+        while pos < fim:
+            linha = f.readline()
+            if not linha: break
+            yield pos, linha
+            pos += len(linha)
+
+def _avaliar_faixa(tarefa: Tuple[int, int, int]) -> Tuple[int, int, int, Dict[str, Any]]:
+    i, inicio, fim = tarefa
+    o = _ESTADO
+    avaliar_a, avaliar_b, campo_id = o["a"].evaluate, o["b"].evaluate, o["id"]
+    cabecalho = o["cabecalho"]
+    ler = (lambda l: _csv_row(dict(zip(cabecalho, next(csv.reader([l.decode("utf-8")])))))) if cabecalho else json.loads
+    linhas, status_a, status_b, viradas, entraram, sairam = 0, Counter(), Counter(), Counter(), Counter(), Counter()
+    parte = os.path.join(o["saida"], "partes", f"{i:06d}.jsonl")
+    with open(parte + ".tmp", "w", encoding="utf-8") as out:
+        for pos, linha in _linhas(o["entrada"], inicio, fim):
+            if not linha.strip(): continue
+            r = ler(linha)
+            linhas += 1
+            sa, ma = avaliar_a(r, False)
+            sb, mb = avaliar_b(r, False)
+            status_a[sa] += 1; status_b[sb] += 1
+            if ma == mb: continue
+            novos, removidos = [m for m in mb if m not in ma], [m for m in ma if m not in mb]
+            entraram.update(novos); sairam.update(removidos)
+            if sa != sb:
+                viradas[f"{sa} -> {sb}"] += 1
+                reg = {"byte": pos, "de": sa, "para": sb, "entraram": novos, "sairam": removidos}
+                if campo_id: reg = {campo_id: r.get(campo_id), **reg}
+                out.write(json.dumps(reg, ensure_ascii=False, default=str) + "\n")
+    os.replace(parte + ".tmp", parte)
+    return i, inicio, fim, {"linhas": linhas, "status_a": status_a, "status_b": status_b, "viradas": viradas,
+                            "entraram": entraram, "sairam": sairam}
+
+# ---- checkpoint e relatório ----
+def _ler_checkpoint(caminho: str) -> Dict[int, Dict[str, Any]]:
+    # Uma linha por faixa concluída; uma última linha sem \n (processo interrompido no meio da escrita) é descartada
+    if not os.path.exists(caminho): return {}
+    with open(caminho, "rb+") as f:
+        dados = f.read()
+        completo = dados[:dados.rfind(b"\n") + 1]
+        if len(completo) != len(dados): f.truncate(len(completo))
+    return {d["faixa"]: d for d in map(json.loads, completo.decode("utf-8").splitlines())}
+
+def _relatorio(saida: str, feitas: Dict[int, Dict[str, Any]], manifesto: Dict[str, Any], segundos: float) -> Dict[str, Any]:
+    total = {k: Counter() for k in ("status_a", "status_b", "viradas", "entraram", "sairam")}
+    for d in feitas.values():
+        for k, c in total.items(): c.update(d[k])
+    with open(os.path.join(saida, "alterados.jsonl"), "wb") as out:
+        for i in sorted(feitas):
+            with open(os.path.join(saida, "partes", f"{i:06d}.jsonl"), "rb") as parte: shutil.copyfileobj(parte, out)
+    motivos = sorted(set(total["entraram"]) | set(total["sairam"]))
+    rel = {
+        "entrada": manifesto["entrada"], "regras_a": manifesto["fonte_a"], "regras_b": manifesto["fonte_b"],
+        "linhas": sum(d["linhas"] for d in feitas.values()), "segundos": round(segundos, 3),
+        "status_a": dict(total["status_a"]), "status_b": dict(total["status_b"]), "viradas": dict(total["viradas"]),
+        "motivos": {m: {"entraram": total["entraram"][m], "sairam": total["sairam"][m]} for m in motivos},
+        "alterados": "alterados.jsonl",
+    }
+    with open(os.path.join(saida, "relatorio.json"), "w", encoding="utf-8") as f: json.dump(rel, f, ensure_ascii=False, indent=2)
+    return rel
+
+def replay(entrada: str, saida: str, fonte_a: str = "atual", fonte_b: str = "atual", processos: int | None = None,
+           bloco: int = 8 << 20, formato: str | None = None, id_field: str | None = None, recomecar: bool = False,
+           progresso: bool = False) -> Dict[str, Any]:
+    regras_a, regras_b = carregar_regras(fonte_a), carregar_regras(fonte_b)
+    formato = formato or ("csv" if entrada.endswith(".csv") else "jsonl")
+    cabecalho, inicio = None, 0
+    if formato == "csv":
+        with open(entrada, "rb") as f: primeira = f.readline()
+        cabecalho, inicio = next(csv.reader([primeira.decode("utf-8-sig")])), len(primeira)
+    st = os.stat(entrada)
+    manifesto = {"entrada": os.path.abspath(entrada), "tamanho": st.st_size, "mtime_ns": st.st_mtime_ns, "formato": formato,
+                 "bloco": bloco, "id": id_field, "fonte_a": fonte_a, "fonte_b": fonte_b,
+                 "regras_a": _impressao(regras_a), "regras_b": _impressao(regras_b)}
+
+    caminho_m, caminho_c = os.path.join(saida, "manifesto.json"), os.path.join(saida, "checkpoint.jsonl")
+    if recomecar and os.path.isdir(saida): shutil.rmtree(saida)
+    os.makedirs(os.path.join(saida, "partes"), exist_ok=True)
+    if os.path.exists(caminho_m):
+        with open(caminho_m, encoding="utf-8") as f: anterior = json.load(f)
+        if anterior != manifesto:
+            diferentes = sorted(k for k in manifesto if anterior.get(k) != manifesto[k])
+            raise ValueError(f"{saida} tem checkpoint de outra execução (mudou: {', '.join(diferentes)}); use --recomecar")
+    else:
+        with open(caminho_m, "w", encoding="utf-8") as f: json.dump(manifesto, f, ensure_ascii=False, indent=2)
+
+    feitas = _ler_checkpoint(caminho_c)
+    todas = faixas(entrada, bloco, inicio)
+    tarefas = [(i, ini, fim) for i, (ini, fim) in enumerate(todas) if i not in feitas]
+    opcoes = {"entrada": entrada, "saida": saida, "cabecalho": cabecalho, "id": id_field}
+    t0 = time.perf_counter()
+    with open(caminho_c, "a", encoding="utf-8") as ck, Pool(processos, _iniciar, (regras_a, regras_b, opcoes)) as pool:
+        for i, ini, fim, contagem in pool.imap_unordered(_avaliar_faixa, tarefas):
+            feitas[i] = {"faixa": i, "inicio": ini, "fim": fim, **contagem}
+            ck.write(json.dumps(feitas[i], ensure_ascii=False) + "\n"); ck.flush()
+            if progresso:
+                print(f"\r{len(feitas)}/{len(todas)} faixas", end="", file=sys.stderr, flush=True)
+    if progresso and tarefas: print(file=sys.stderr)
+    return _relatorio(saida, feitas, manifesto, time.perf_counter() - t0)
+
+def main(argv: List[str] | None = None) -> None:
+    p = argparse.ArgumentParser(description="Reavalia respostas salvas sob duas versões das regras e relata o que muda.")
+    p.add_argument("entrada", nargs="?", help="arquivo .jsonl ou .csv")
+    p.add_argument("-o", "--saida", default="replay", help="diretório do relatório e do checkpoint")
+    p.add_argument("--regras-a", default="atual", help="atual | git:<rev> | regras.json | regras.py (padrão: atual)")
+    p.add_argument("--regras-b", default="atual", help="versão candidata, mesmos formatos")
+    p.add_argument("-j", "--processos", type=int, default=None, help="processos no pool (padrão: núcleos da máquina)")
+    p.add_argument("--bloco-mb", type=float, default=8, help="tamanho de cada faixa da entrada")
+    p.add_argument("--formato", choices=["jsonl", "csv"], help="força o formato da entrada")
+    p.add_argument("--id", dest="id_field", help="campo da entrada copiado para cada registro alterado (ex.: email)")
+    p.add_argument("--recomecar", action="store_true", help="descarta o checkpoint da saída")
+    p.add_argument("--exportar-regras", metavar="ARQUIVO", help="grava as regras atuais em JSON (para editar e usar em --regras-b)")
+    args = p.parse_args(argv)
+    if args.exportar_regras:
+        exportar_regras(args.exportar_regras); return
+    if not args.entrada: p.error("informe o arquivo de entrada")
+    try:
+        rel = replay(args.entrada, args.saida, args.regras_a, args.regras_b, args.processos, int(args.bloco_mb * (1 << 20)),
+                     args.formato, args.id_field, args.recomecar, progresso=True)
+    except ValueError as e:
+        p.exit(2, f"{e}\n")
+    print(f"{rel['linhas']} respostas: A {rel['status_a']}  B {rel['status_b']}", file=sys.stderr)
+    print(f"status alterados: {rel['viradas'] or 0}", file=sys.stderr)
+    for m, c in rel["motivos"].items(): print(f"  +{c['entraram']:<7} -{c['sairam']:<7} {m}", file=sys.stderr)
+    print(f"relatório em {os.path.join(args.saida, 'relatorio.json')}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
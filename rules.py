@@ -0,0 +1,208 @@
+import os
+from typing import Dict, Any, Iterable, List, Tuple
+from datetime import date
+from time import perf_counter_ns
+
+# -------- Regras clínicas (sem dependência de Streamlit) --------
+def calc_idade(d: date | None) -> int | None:
+    if not d: return None
+    today = date.today()
+    return today.year - d.year - ((today.month, today.day) < (d.month, d.day))
+
+EXCIPIENTES_COMUNS = [
+    "Polietilenoglicol (PEG)",
+    "Metacresol / Fenol",
+    "Fosfatos (fosfato dissódico etc.)",
+    "Látex (agulhas/rolhas/camisinha)",
+    "Carboximetilcelulose",
+    "Trometamina (TRIS)",
+    "Não tenho alergia a esses componentes",
+]
+SEM_ALERGIA = EXCIPIENTES_COMUNS[-1]
+
+def norm_orgao(v: str) -> str:
+    mapa = {"Está normal":"normal","Normal":"normal","normal":"normal","Leve":"leve","leve":"leve","Moderada":"moderada","moderada":"moderada","Grave":"grave","grave":"grave","Não sei informar":"desconhecido","não sei informar":"desconhecido"}
+    return mapa.get(v, "desconhecido")
+
+# -------- Tabela de regras --------
+# Cada regra: (campo, operador, valor, mensagem[, condições extras]). As condições extras são
+# (campo, operador, valor) e precisam valer junto com a principal. A ordem da tabela é a ordem dos motivos.
+# Campos derivados: "idade" (de data_nascimento, ou o campo idade informado) e "imc" (de peso/altura).
+REGRAS = [
+    ("idade", "<", 18, "Menor de 18 anos."),
+    ("gravidez", "==", "sim", "Gestação em curso."),
+    ("amamentando", "==", "sim", "Amamentação em curso."),
+    ("tratamento_cancer", "==", "sim", "Tratamento oncológico ativo."),
+    ("pancreatite_previa", "==", "sim", "História de pancreatite prévia."),
+    ("historico_mtc_men2", "==", "sim", "História pessoal/familiar de carcinoma medular de tireoide (MTC) ou MEN2."),
+    ("alergia_glp1", "==", "sim", "Hipersensibilidade conhecida a análogos de GLP-1."),
+    ("alergias_componentes", "informado_exceto", [SEM_ALERGIA], "Alergia relatada a excipientes comuns de formulações injetáveis (ver detalhes)."),
+    ("gi_grave", "==", "sim", "Doença gastrointestinal grave ativa."),
+    ("gastroparesia", "==", "sim", "Gastroparesia diagnosticada."),
+    ("colecistite_12m", "==", "sim", "Colecistite/colelitíase sintomática nos últimos 12 meses."),
+    ("insuf_renal", "in", ("moderada", "grave"), "Insuficiência renal moderada/grave (necessita avaliação médica)."),
+    ("insuf_hepatica", "in", ("moderada", "grave"), "Insuficiência hepática moderada/grave (necessita avaliação médica)."),
+    ("transtorno_alimentar", "==", "sim", "Transtorno alimentar ativo."),
+    ("uso_corticoide", "==", "sim", "Uso crônico de corticoide (requer avaliação)."),
+    ("antipsicoticos", "==", "sim", "Uso de antipsicóticos (requer avaliação)."),
+    ("imc", "<", 27, "IMC < 27 sem comorbidades relevantes.", [("tem_comorbidades", "==", "nao")]),
+]
+
+# Motivo -> campo da regra (rótulo curto para métricas e relatórios)
+CAMPO_DO_MOTIVO = {r[3]: r[0] for r in REGRAS}
+
+# Expressões de cada operador; {v} é o valor da resposta e {x} o valor da regra
+OPERADORES = {
+    "==": "{v} == {x}",
+    "!=": "{v} != {x}",
+    "in": "{v} in {x}",
+    "<": "({v} is not None and {v} < {x})",
+    ">=": "({v} is not None and {v} >= {x})",
+    "informado_exceto": "({v} and {v} != {x})",
+}
+
+def derive_idade(a: Dict[str, Any]) -> Any:
+    # Mesmo efeito colateral da versão original: grava idade/idade_calculada quando a data é válida
+    dob = a.get("data_nascimento")
+    if dob:
+        try:
+            if isinstance(dob, str): dob = date.fromisoformat(dob)
+            idade = calc_idade(dob)
+            if idade is not None: a["idade"] = idade; a["idade_calculada"] = idade
+        except Exception: pass
+    return a.get("idade")
+
+def derive_imc(a: Dict[str, Any]) -> float | None:
+    peso, altura = a.get("peso"), a.get("altura")
+    try:
+        return float(peso) / (float(altura) ** 2) if peso and altura else None
+    except Exception:
+        return None
+
+DERIVADOS = {"idade": derive_idade, "imc": derive_imc}
+
+def condicoes(regra: tuple) -> List[tuple]:
+    return [regra[:3]] + list(regra[4] if len(regra) > 4 else [])
+
+# Tabela compilada em uma única função Python (uma passada, cada campo lido uma vez). Mantém por regra
+# quantas vezes foi checada e quantas disparou; o tempo acumulado (ns) só com medir_tempo=True, porque os dois
+# perf_counter_ns por regra deixam a avaliação ~1,6x mais lenta. Os contadores não usam lock:
+# sob concorrência são aproximados, o que basta para observação.
+class RuleEngine:
+
+    def __init__(self, regras: List[tuple], medir_tempo: bool = False):
+        for r in regras:
+            for _, op, _ in condicoes(r):
+                if op not in OPERADORES: raise ValueError(f"Operador desconhecido na regra {r!r}: {op}")
+        self.regras = list(regras)
+        self.mensagens = [r[3] for r in self.regras]
+        self.medir_tempo = medir_tempo
+        self.checadas = [0] * len(self.regras)
+        self.disparos = [0] * len(self.regras)
+        self.tempo_ns = [0] * len(self.regras)
+        self._fn = self._compilar()
+
+    def _compilar(self):
+        ns: Dict[str, Any] = {"checadas": self.checadas, "disparos": self.disparos, "tempo_ns": self.tempo_ns,
+                              "perf_counter_ns": perf_counter_ns, "msgs": self.mensagens}
+        linhas = ["def avaliar(a, curto):", "    g = a.get", "    exclusion = []"]
+        lidos: Dict[str, str] = {}
+        for i, regra in enumerate(self.regras):
+            if self.medir_tempo: linhas.append("    t0 = perf_counter_ns()")
+            # Campos lidos (ou derivados) na primeira regra que os usa, então o custo entra no tempo dela
+            partes = []
+            for j, (campo, op, valor) in enumerate(condicoes(regra)):
+                if campo not in lidos:
+                    var = lidos[campo] = f"v{len(lidos)}"
+                    if campo in DERIVADOS:
+                        ns[f"d_{var}"] = DERIVADOS[campo]
+                        linhas.append(f"    {var} = d_{var}(a)")
+                    else:
+                        linhas.append(f"    {var} = g({campo!r})")
+                ns[f"k{i}_{j}"] = valor
+                partes.append(OPERADORES[op].format(v=lidos[campo], x=f"k{i}_{j}"))
+            linhas += [
+                f"    checadas[{i}] += 1",
+                f"    if {' and '.join(partes)}:",
+                f"        disparos[{i}] += 1",
+                f"        exclusion.append(msgs[{i}])",
+            ]
+            if self.medir_tempo:
+                linhas += [f"        if curto: tempo_ns[{i}] += perf_counter_ns() - t0; return 'excluido', exclusion",
+                           f"    tempo_ns[{i}] += perf_counter_ns() - t0"]
+            else:
+                linhas.append("        if curto: return 'excluido', exclusion")
+        linhas.append("    return ('excluido' if exclusion else 'potencialmente_elegivel'), exclusion")
+        exec(compile("\n".join(linhas), "<regras>", "exec"), ns)
+        return ns["avaliar"]
+
+    def evaluate(self, a: Dict[str, Any], short_circuit: bool = False):
+        return self._fn(a, short_circuit)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [{"campo": r[0], "mensagem": r[3], "checadas": c, "disparos": d, "tempo_ms": t / 1e6}
+                for r, c, d, t in zip(self.regras, self.checadas, self.disparos, self.tempo_ns)]
+
+    def reset_stats(self) -> None:
+        for lista in (self.checadas, self.disparos, self.tempo_ns): lista[:] = [0] * len(lista)
+
+# VIALEVE_RULE_TIMING=1 liga o tempo por regra (diagnóstico); o tempo da avaliação inteira já vai para vialeve_rules_seconds
+ENGINE = RuleEngine(REGRAS, medir_tempo=os.environ.get("VIALEVE_RULE_TIMING") == "1")
+
+def evaluate_rules(a: Dict[str, Any], short_circuit: bool = False):
+    # short_circuit=True para no primeiro motivo (basta quando só o status interessa)
+    return ENGINE.evaluate(a, short_circuit)
+
+# -------- Avaliação incremental --------
+# Guarda, por sessão, se cada regra disparou; a cada gravação de respostas só as regras que dependem dos campos
+# alterados são checadas de novo. resultado() é sempre igual a evaluate_rules sobre as mesmas respostas.
+# a: answers.Answers (get() já entrega idade e imc) ou um dict (os derivados saem de DERIVADOS, como em evaluate_rules).
+DEPENDENCIAS = {"idade": ("data_nascimento", "idade"), "imc": ("peso", "altura")}
+CAMPOS_REGRAS = tuple(dict.fromkeys(c for r in REGRAS for c, _, _ in condicoes(r)))
+
+def _leitor(a: Any):
+    if not isinstance(a, dict): return a.get
+    return lambda c: DERIVADOS[c](a) if c in DERIVADOS else a.get(c)
+
+def _predicado(regra: tuple):
+    ns: Dict[str, Any] = {}
+    partes = []
+    for j, (campo, op, valor) in enumerate(condicoes(regra)):
+        ns[f"k{j}"] = valor
+        partes.append(OPERADORES[op].format(v=f"g({campo!r})", x=f"k{j}"))
+    return eval(f"lambda g: bool({' and '.join(partes)})", ns)
+
+def _compilar_incremental(regras: List[tuple]) -> Tuple[List[tuple], List[Any], Dict[str, List[int]]]:
+    # Predicados e campo -> regras que o leem (derivados expandidos); montados uma vez, compartilhados pelas sessões
+    dependentes: Dict[str, List[int]] = {}
+    for i, r in enumerate(regras):
+        for campo, _, _ in condicoes(r):
+            for c in DEPENDENCIAS.get(campo, (campo,)): dependentes.setdefault(c, []).append(i)
+    return list(regras), [_predicado(r) for r in regras], dependentes
+
+TABELA_INCREMENTAL = _compilar_incremental(REGRAS)
+
+class IncrementalEvaluation:
+    __slots__ = ("regras", "_predicados", "_dependentes", "disparou", "checadas")
+
+    def __init__(self, regras: List[tuple] | None = None):
+        self.regras, self._predicados, self._dependentes = TABELA_INCREMENTAL if regras is None else _compilar_incremental(regras)
+        self.disparou = [False] * len(self.regras)
+        self.checadas = 0  # regras checadas desde a criação (para comparar com avaliações completas)
+
+    def atualizar(self, a: Any, alterados: Iterable[str] | None = None) -> str:
+        # alterados=None checa todas; devolve o status provisório
+        if alterados is None: indices = range(len(self.regras))
+        else: indices = {i for c in alterados for i in self._dependentes.get(c, ())}
+        if not indices: return self.status
+        g = _leitor(a)
+        for i in indices: self.disparou[i] = self._predicados[i](g)
+        self.checadas += len(indices)
+        return self.status
+
+    @property
+    def status(self) -> str:
+        return "excluido" if any(self.disparou) else "potencialmente_elegivel"
+
+    def resultado(self) -> Tuple[str, List[str]]:
+        return self.status, [r[3] for r, d in zip(self.regras, self.disparou) if d]
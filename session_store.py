@@ -0,0 +1,177 @@
+import atexit
+import json
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+# -------- Estado das sessões fora do processo --------
+# Guarda o fluxo de cada sessão (etapa, respostas, resultado) sob um token que vai na URL (?t=...): outra réplica do
+# app, ou o mesmo processo depois de reiniciar, retoma o fluxo na etapa certa. Interface dos backends (duck typing):
+#   save(token, versao, estado) -> ticket   não bloqueia; a gravação é feita em segundo plano
+#   wait(ticket, timeout) -> bool            espera a gravação daquele save (o app chama no fim da execução)
+#   load(token) -> (versao, estado) | None   None se não existe ou passou de ttl segundos sem salvar
+#   delete(token), flush(timeout), close()
+# SQLiteSessionStore: arquivo compartilhado pelas réplicas da mesma máquina (WAL). Como no store, uma thread de escrita
+# grava o que estiver pendente numa única transação; saves do mesmo token no lote viram um só. Cada save leva a
+# versão da sessão e o upsert não volta atrás: uma aba antiga em outra réplica não sobrescreve um estado mais novo.
+# Transação que falha não descarta o lote: a thread tenta de novo com backoff (load continua vendo os saves pendentes).
+# MemorySessionStore: dict do processo, para uma réplica só (e testes).
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessoes (
+    token TEXT PRIMARY KEY,
+    versao INTEGER NOT NULL,
+    atualizado_em REAL NOT NULL,
+    estado TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_sessoes_atualizado_em ON sessoes(atualizado_em);
+"""
+
+UPSERT = """
+INSERT INTO sessoes (token, versao, atualizado_em, estado) VALUES (?, ?, ?, ?)
+ON CONFLICT(token) DO UPDATE SET versao = excluded.versao, atualizado_em = excluded.atualizado_em, estado = excluded.estado
+WHERE excluded.versao > sessoes.versao
+"""
+
+def _conectar(path: str) -> sqlite3.Connection:
+    con = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    con.execute("PRAGMA journal_mode=WAL")
+    return con
+
+class SQLiteSessionStore:
+    def __init__(self, path: str, ttl: float = 1800.0, lote_max: int = 500, synchronous: str = "NORMAL"):
+        self.path, self.ttl, self.lote_max = path, ttl, lote_max
+        con = _conectar(path)
+        con.executescript(SCHEMA)
+        con.close()
+        self._fila: "queue.SimpleQueue[Tuple | None]" = queue.SimpleQueue()
+        self._pendentes: Dict[str, Tuple] = {}  # token -> último save ainda não gravado (load lê daqui primeiro)
+        self._cond = threading.Condition()
+        self._enviados = self._gravados = self.lotes = 0
+        self.descartados = 0  # saves que o banco recusou até o close()
+        self._erro: BaseException | None = None
+        self._synchronous = synchronous
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._escrever, name="vialeve-sessions", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ---- escrita ----
+    def save(self, token: str, versao: int, estado: Dict[str, Any]) -> int:
+        registro = (token, versao, time.time(), json.dumps(estado, ensure_ascii=False, separators=(",", ":"), default=str))
+        return self._enfileirar(registro)
+
+    def delete(self, token: str) -> int:
+        return self._enfileirar((token, None, time.time(), None))
+
+    def _enfileirar(self, registro: Tuple) -> int:
+        with self._cond:
+            self._enviados += 1; ticket = self._enviados
+            self._pendentes[registro[0]] = registro
+        self._fila.put(registro)
+        return ticket
+
+    def _escrever(self) -> None:
+        con = _conectar(self.path)
+        con.execute(f"PRAGMA synchronous={self._synchronous}")
+        proxima_limpeza = time.monotonic() + self.ttl / 10
+        fim = False
+        while not fim:
+            lote = [self._fila.get()]
+            while len(lote) < self.lote_max:
+                try: lote.append(self._fila.get_nowait())
+                except queue.Empty: break
+            if None in lote:
+                fim = True; lote = [r for r in lote if r is not None]
+            ultimos = {r[0]: r for r in lote}  # só o último save de cada token no lote
+            limpar = time.monotonic() > proxima_limpeza
+            gravou = self._gravar(con, ultimos, limpar)
+            if gravou and limpar: proxima_limpeza = time.monotonic() + self.ttl / 10
+            with self._cond:
+                for t, r in ultimos.items():
+                    if self._pendentes.get(t) is r: del self._pendentes[t]
+                if gravou: self._gravados += len(lote); self.lotes += 1
+                else: self.descartados += len(lote)
+                self._cond.notify_all()
+        con.close()
+
+    def _gravar(self, con: sqlite3.Connection, ultimos: Dict[str, Tuple], limpar: bool) -> bool:
+        # Tenta até conseguir; só desiste se o store está sendo fechado (o estado é de sessões em andamento e expira)
+        espera = 0.05
+        while True:
+            try:
+                with con:
+                    con.executemany(UPSERT, [r for r in ultimos.values() if r[3] is not None])
+                    con.executemany("DELETE FROM sessoes WHERE token = ?", [(t,) for t, r in ultimos.items() if r[3] is None])
+                    if limpar: con.execute("DELETE FROM sessoes WHERE atualizado_em < ?", (time.time() - self.ttl,))
+                return True
+            except sqlite3.Error as e:
+                self._erro = e
+                if self._parar.wait(espera): return False
+                espera = min(espera * 2, 5.0)
+
+    def wait(self, ticket: int, timeout: float | None = None) -> bool:
+        # False se o save não chegou ao banco no prazo (ou foi descartado no close)
+        with self._cond:
+            return self._cond.wait_for(lambda: self._gravados + self.descartados >= ticket, timeout) and not self.descartados
+
+    def flush(self, timeout: float | None = None) -> bool:
+        return self.wait(self._enviados, timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._thread.is_alive():
+            self._fila.put(None)
+            self._thread.join(timeout)
+            self._parar.set()
+            self._thread.join()
+
+    # ---- leitura (conexão própria; uma vez por sessão nova) ----
+    def load(self, token: str) -> Tuple[int, Dict[str, Any]] | None:
+        with self._cond: r = self._pendentes.get(token)
+        if r is None:
+            con = _conectar(self.path)
+            try: r = con.execute("SELECT token, versao, atualizado_em, estado FROM sessoes WHERE token = ?", (token,)).fetchone()
+            finally: con.close()
+        if r is None or r[3] is None or r[2] < time.time() - self.ttl: return None
+        return r[1], json.loads(r[3])
+
+    @property
+    def pending(self) -> int:
+        return self._enviados - self._gravados - self.descartados
+
+    @property
+    def last_error(self) -> BaseException | None:
+        return self._erro
+
+class MemorySessionStore:
+    def __init__(self, ttl: float = 1800.0):
+        self.ttl = ttl
+        self._sessoes: Dict[str, Tuple[int, float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def save(self, token: str, versao: int, estado: Dict[str, Any]) -> int:
+        with self._lock:
+            if versao > self._sessoes.get(token, (-1,))[0]: self._sessoes[token] = (versao, time.time(), dict(estado))
+        return 0
+
+    def delete(self, token: str) -> int:
+        with self._lock: self._sessoes.pop(token, None)
+        return 0
+
+    def load(self, token: str) -> Tuple[int, Dict[str, Any]] | None:
+        with self._lock: r = self._sessoes.get(token)
+        if r is None or r[1] < time.time() - self.ttl: return None
+        return r[0], r[2]
+
+    def wait(self, ticket: int, timeout: float | None = None) -> bool: return True
+    def flush(self, timeout: float | None = None) -> bool: return True
+    def close(self) -> None: pass
+
+def open_session_store(url: str, ttl: float = 1800.0):
+    # "sqlite:<arquivo>" ou "memory:"
+    tipo, _, caminho = url.partition(":")
+    if tipo == "sqlite": return SQLiteSessionStore(caminho or "vialeve_sessoes.db", ttl)
+    if tipo == "memory": return MemorySessionStore(ttl)
+    raise ValueError(f"backend de sessão desconhecido: {url!r} (use sqlite:<arquivo> ou memory:)")
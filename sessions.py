@@ -0,0 +1,40 @@
+import threading
+import time
+import weakref
+
+from answers import Answers
+
+# -------- Sessões ociosas --------
+# Cada execução do script "toca" as respostas da sessão. Quem ficar mais de ttl segundos sem executar tem as respostas
+# apagadas (Answers.clear) e marcadas como expiradas; o app recomeça o fluxo quando essa sessão voltar. As referências
+# são fracas: sessões que o Streamlit já descartou somem sozinhas daqui.
+
+class IdleSessions:
+    def __init__(self, ttl: float = 1800.0, intervalo: float | None = None):
+        self.ttl = ttl
+        self.intervalo = ttl / 10 if intervalo is None else intervalo  # varredura no máximo uma vez por intervalo
+        self._vistas: "weakref.WeakKeyDictionary[Answers, float]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._ultima_varredura = time.monotonic()
+        self.expiradas = 0
+
+    def touch(self, answers: Answers) -> None:
+        agora = time.monotonic()
+        with self._lock:
+            self._vistas[answers] = agora
+            if agora - self._ultima_varredura < self.intervalo: return
+            self._ultima_varredura = agora
+        self.sweep(agora)
+
+    def sweep(self, agora: float | None = None) -> int:
+        agora = time.monotonic() if agora is None else agora
+        with self._lock:
+            velhas = [a for a, visto in self._vistas.items() if agora - visto > self.ttl]
+            for a in velhas:
+                a.clear(); a.expirada = True
+                del self._vistas[a]
+            self.expiradas += len(velhas)
+        return len(velhas)
+
+    def __len__(self) -> int:
+        return len(self._vistas)
@@ -0,0 +1,52 @@
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict
+
+from streamlit import config, runtime
+
+# -------- Logo e folha de estilo como arquivos estáticos --------
+# Os fontes ficam em assets/ e são minificados uma vez, na importação (início do processo). A página só referencia os
+# arquivos: antes o SVG e o <style> iam inteiros no delta de toda execução do script. O /app/static do Streamlit
+# (server.enableStaticServing) responde text/plain + nosniff para tudo que não é imagem raster, então o navegador não
+# aplicaria o CSS nem desenharia o SVG; por isso os bytes vão para o gerenciador de mídia do próprio Streamlit, que serve
+# /media/<sha224 do conteúdo>.<ext> com o Content-Type certo e, com ?v= na URL, Cache-Control de 10 anos (tornado).
+
+PASTA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+def minificar_css(texto: str) -> str:
+    texto = re.sub(r"/\*.*?\*/", "", texto, flags=re.S)
+    texto = re.sub(r"\s+", " ", texto)
+    texto = re.sub(r"\s*([{}:;,>])\s*", r"\1", texto)
+    return texto.replace(";}", "}").strip()
+
+def minificar_svg(texto: str) -> str:
+    texto = re.sub(r"<!--.*?-->", "", texto, flags=re.S)
+    texto = re.sub(r">\s+<", "><", texto)
+    texto = re.sub(r"\s+", " ", texto)
+    return texto.replace(" />", "/>").strip()
+
+@dataclass(frozen=True, slots=True)
+class Asset:
+    nome: str
+    mimetype: str
+    dados: bytes
+    versao: str  # hash do conteúdo minificado; muda a URL quando o arquivo muda
+
+def carregar(nome: str, mimetype: str, minificar) -> Asset:
+    with open(os.path.join(PASTA, nome), encoding="utf-8") as f: dados = minificar(f.read()).encode()
+    return Asset(nome, mimetype, dados, hashlib.sha256(dados).hexdigest()[:12])
+
+ASSETS: Dict[str, Asset] = {a.nome: a for a in (
+    carregar("vialeve.css", "text/css", minificar_css),
+    carregar("logo.svg", "image/svg+xml", minificar_svg),
+)}
+
+def url(nome: str) -> str:
+    # Chamado a cada execução: registra o arquivo para a sessão (o Streamlit apaga mídia que nenhuma sessão usa) e
+    # devolve a mesma URL enquanto o conteúdo não mudar. add() só faz um sha224 de ~2 KB quando o arquivo já existe.
+    a = ASSETS[nome]
+    caminho = runtime.get_instance().media_file_mgr.add(a.dados, a.mimetype, f"vialeve-asset-{a.nome}")
+    base = config.get_option("server.baseUrlPath").strip("/")
+    return f"{'/' + base if base else ''}{caminho}?v={a.versao}"
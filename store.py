@@ -0,0 +1,151 @@
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+# -------- Armazenamento das respostas concluídas --------
+# SQLite em modo WAL, somente inserção. Quem chama (o script do Streamlit) só coloca o registro numa fila;
+# uma thread de escrita junta o que estiver pendente e grava tudo numa única transação (group commit).
+# Se a transação falha (disco cheio, banco travado), o lote não é descartado: a thread tenta de novo com backoff e
+# flush() só retorna True depois de gravado. Se o banco ainda falha no close(), o lote vai para <banco>.pendentes.jsonl,
+# que é inserido na próxima abertura do store.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    criado_em TEXT NOT NULL,
+    email TEXT,
+    status TEXT,
+    dados TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_submissions_email ON submissions(email);
+CREATE INDEX IF NOT EXISTS idx_submissions_criado_em ON submissions(criado_em);
+"""
+
+def _agora() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+INSERT = "INSERT INTO submissions (criado_em, email, status, dados) VALUES (?, ?, ?, ?)"
+
+def _conectar(path: str) -> sqlite3.Connection:
+    con = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    con.execute("PRAGMA journal_mode=WAL")
+    return con
+
+class SubmissionStore:
+    def __init__(self, path: str, lote_max: int = 500, synchronous: str = "NORMAL"):
+        self.path = path
+        self.lote_max = lote_max
+        self.spill_path = path + ".pendentes.jsonl"
+        con = _conectar(path)
+        con.executescript(SCHEMA)
+        self._retomar(con)
+        con.close()
+        self._parar = threading.Event()
+        self._fila: "queue.SimpleQueue[Tuple | None]" = queue.SimpleQueue()
+        self._cond = threading.Condition()
+        self._enviados = 0
+        self._gravados = 0
+        self.derramados = 0  # registros que foram para o arquivo de pendentes em vez do banco
+        self._erro: BaseException | None = None
+        self._synchronous = synchronous
+        self._thread = threading.Thread(target=self._escrever, name="vialeve-store", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ---- escrita ----
+    def submit(self, answers: Dict[str, Any], status: str | None = None, reasons: List[str] | None = None) -> None:
+        # Não bloqueia: serializa e enfileira; a gravação acontece na thread de escrita
+        dados = json.dumps({"answers": answers, "status": status, "reasons": reasons or []}, ensure_ascii=False, default=str)
+        with self._cond: self._enviados += 1
+        self._fila.put((_agora(), answers.get("email"), status, dados))
+
+    def _escrever(self) -> None:
+        con = _conectar(self.path)
+        con.execute(f"PRAGMA synchronous={self._synchronous}")
+        fim = False
+        while not fim:
+            lote = [self._fila.get()]
+            # Junta tudo o que chegou enquanto a última transação gravava
+            while len(lote) < self.lote_max:
+                try: lote.append(self._fila.get_nowait())
+                except queue.Empty: break
+            if None in lote:
+                fim = True; lote = [r for r in lote if r is not None]
+            gravou = not lote or self._gravar(con, lote)
+            if not gravou: self._derramar(lote)
+            with self._cond:
+                if gravou: self._gravados += len(lote)
+                else: self.derramados += len(lote)
+                self._cond.notify_all()
+        con.close()
+
+    def _gravar(self, con: sqlite3.Connection, lote: List[Tuple]) -> bool:
+        # Tenta até conseguir; só desiste (False) se o store está sendo fechado
+        espera = 0.05
+        while True:
+            try:
+                with con: con.executemany(INSERT, lote)
+                return True
+            except sqlite3.Error as e:
+                self._erro = e
+                if self._parar.wait(espera): return False
+                espera = min(espera * 2, 5.0)
+
+    def _derramar(self, lote: List[Tuple]) -> None:
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in lote)
+
+    def _retomar(self, con: sqlite3.Connection) -> None:
+        # Lotes que um processo anterior não conseguiu gravar; o arquivo só some depois do commit
+        if not os.path.exists(self.spill_path): return
+        with open(self.spill_path, encoding="utf-8") as f: lote = [tuple(json.loads(l)) for l in f if l.strip()]
+        with con: con.executemany(INSERT, lote)
+        os.remove(self.spill_path)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        # Espera até que tudo o que foi enviado até agora esteja gravado (False se algo foi para o arquivo de pendentes)
+        with self._cond:
+            alvo = self._enviados
+            return self._cond.wait_for(lambda: self._gravados + self.derramados >= alvo, timeout) and self._gravados >= alvo
+
+    def close(self, timeout: float = 5.0) -> None:
+        # Dá timeout segundos para gravar o que falta; depois disso, lotes que continuam falhando vão para o arquivo
+        if self._thread.is_alive():
+            self._fila.put(None)
+            self._thread.join(timeout)
+            self._parar.set()
+            self._thread.join()
+
+    @property
+    def pending(self) -> int:
+        return self._enviados - self._gravados - self.derramados
+
+    @property
+    def last_error(self) -> BaseException | None:
+        return self._erro
+
+    # ---- consultas (conexão própria; o WAL permite ler enquanto a thread grava) ----
+    def _consultar(self, sql: str, args: Tuple) -> List[Dict[str, Any]]:
+        con = _conectar(self.path)
+        try:
+            linhas = con.execute(sql, args).fetchall()
+        finally:
+            con.close()
+        return [{"id": i, "criado_em": c, "email": e, "status": s, **json.loads(d)} for i, c, e, s, d in linhas]
+
+    def find_by_email(self, email: str) -> List[Dict[str, Any]]:
+        return self._consultar("SELECT id, criado_em, email, status, dados FROM submissions WHERE email = ? ORDER BY id", (email,))
+
+    def find_between(self, desde: str, ate: str) -> List[Dict[str, Any]]:
+        # Datas ISO 8601 em UTC, como gravadas em criado_em (ex.: "2026-10-01", "2026-10-02T12:00")
+        return self._consultar("SELECT id, criado_em, email, status, dados FROM submissions WHERE criado_em >= ? AND criado_em < ? ORDER BY criado_em", (desde, ate))
+
+    def count(self) -> int:
+        con = _conectar(self.path)
+        try: return con.execute("SELECT COUNT(*) FROM submissions").fetchone()[0]
+        finally: con.close()